@@ -1,15 +1,25 @@
 import os
 import re
-import requests
 from competitive_analyzer import add_competitive_routes, COMPETITIVE_ANALYSIS_TEMPLATE
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
 from datetime import datetime
 from anthropic import Anthropic
 from dotenv import load_dotenv
 import sys
 from content_analyzer import ContentAnalyzer
+from fetch_client import FetchResult
+from http_cache import get_http_cache
+from charset_resolver import decode_html
+from batch_analyzer import read_capped
+from config import FETCH_SETTINGS
+from tiered_fetch import fetch_tiered
+from site_files import probe_site_files
+from sitemap_parser import describe_sitemap
+from robots_rules import blocked_agents
+from page_artifact import PageArtifact
+from crawl_efficiency import crawl_efficiency, describe_crawl_efficiency
 import uuid
 import json
 from datetime import timedelta
@@ -38,8 +48,8 @@ if ANTHROPIC_API_KEY and ANTHROPIC_API_KEY.strip():
 else:
     print("Warning: ANTHROPIC_API_KEY not found or empty. AI recommendations will be disabled.")
 
-def fetch_webpage_content(url):
-    """Fetch and parse webpage content from HTTP(S) or local file:// URLs."""
+def fetch_webpage(url, forbidden_backoff=True):
+    """Fetch a webpage from HTTP(S) or local file:// URLs and return a FetchResult."""
     
     # Handle local file URLs
     if url.startswith('file://'):
@@ -50,46 +60,27 @@ def fetch_webpage_content(url):
             # Handle URL encoding (like %20 for spaces)
             file_path = unquote(file_path)
             
-            # Read the local file
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            # Read the local file, capped like network bodies
+            content, truncated = read_capped(file_path)
+            text, encoding, encoding_source = decode_html(content)
+            return FetchResult(url, content=content, text=text,
+                               encoding=encoding, encoding_source=encoding_source,
+                               truncated_reason=(f"File exceeds the {FETCH_SETTINGS['max_decoded_bytes']} byte limit"
+                                                if truncated else None))
         except FileNotFoundError:
             print(f"File not found: {file_path}")
-            return None
+            return FetchResult(url, error='File not found')
         except Exception as e:
             print(f"Error reading local file: {e}")
-            return None
+            return FetchResult(url, error=str(e))
     
-    # Handle HTTP(S) URLs
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
-        response.raise_for_status()
-        
-        # Check if the response is a PDF
-        content_type = response.headers.get('Content-Type', '').lower()
-        if 'application/pdf' in content_type:
-            print(f"PDF detected via Content-Type header: {content_type}")
-            return None
-        
-        return response.text
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 403:
-            print(f"Access forbidden (403) for URL: {url}")
-            return None
-        else:
-            print(f"HTTP Error fetching URL: {e}")
-            return None
-    except Exception as e:
-        print(f"Error fetching URL: {e}")
-        return None
+    # Handle HTTP(S) URLs: static first, browser rendering only when needed
+    return fetch_tiered(url, forbidden_backoff)
+
+def fetch_webpage_content(url):
+    """Fetch and parse webpage content from HTTP(S) or local file:// URLs."""
+    result = fetch_webpage(url)
+    return result.text if result.ok else None
 
 def generate_optimization_workflow(analysis, score):
     """Generate a step-by-step optimization workflow based on analysis results."""
@@ -118,6 +109,22 @@ def generate_optimization_workflow(analysis, score):
             'impact': 'Ensures AI crawlers can access your content'
         })
     
+    blocked = blocked_agents(analysis.get('ai_crawler_access', {}), page_only=True)
+    if blocked:
+        workflow['quick_wins'].append({
+            'task': f"Review robots.txt rules blocking {', '.join(blocked)}",
+            'impact': 'Blocked AI crawlers cannot read or cite this page'
+        })
+    
+    workflow['quick_wins'].extend(analysis.get('crawl_efficiency', {}).get('recommendations', []))
+    
+    redirect_count = analysis.get('fetch', {}).get('redirect_count', 0)
+    if redirect_count > 1:
+        workflow['quick_wins'].append({
+            'task': f"Link directly to the final URL instead of a {redirect_count}-hop redirect chain",
+            'impact': 'Every extra hop costs crawlers a request and can end the crawl early'
+        })
+    
     if not analysis.get('sitemap_xml'):
         workflow['quick_wins'].append({
             'task': 'Generate and submit sitemap.xml',
@@ -146,6 +153,13 @@ def generate_optimization_workflow(analysis, score):
             'impact': 'AI systems prioritize Q&A format for direct answers'
         })
     
+    rendered_only = analysis.get('render_diff', {}).get('text', {}).get('percent_rendered_only', 0)
+    if analysis.get('render_diff', {}).get('javascript_dependence') in ('high', 'medium'):
+        workflow['deep_optimizations'].append({
+            'task': f"Server-render the {rendered_only:.0f}% of page text that only appears after JavaScript runs",
+            'impact': 'Most AI crawlers do not execute JavaScript and never see that content'
+        })
+    
     if 'content_analysis' in analysis:
         ca = analysis['content_analysis']
         if ca.get('promotional_language', {}).get('is_promotional'):
@@ -187,9 +201,22 @@ def generate_optimization_workflow(analysis, score):
     return workflow
 
 
-def analyze_webpage_structure(html_content, url):
-    """Analyze the structure and content of a webpage, including advanced discoverability checks."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+def analyze_webpage_structure(html_content, url, check_site_files=True, soup=None, fetch_result=None):
+    """Analyze the structure and content of a webpage, including advanced discoverability checks.
+    
+    Pass check_site_files=False for offline input (archives, saved pages)
+    where the live robots.txt/sitemap.xml/llms.txt should not be probed.
+    Pass soup to reuse a tree already parsed for this request (PageArtifact).
+    Pass the FetchResult to add the crawl-efficiency section.
+    """
+    # Start robots.txt, sitemap.xml and llms.txt probes in the background
+    # (only for HTTP(S) URLs); they are joined once the DOM work is done
+    site_probe = None
+    if check_site_files and url.startswith(('http://', 'https://')):
+        site_probe = probe_site_files(url)
+
+    if soup is None:
+        soup = BeautifulSoup(html_content, 'html.parser')
     
     # Initialize content analyzer
     content_analyzer = ContentAnalyzer()
@@ -232,6 +259,8 @@ def analyze_webpage_structure(html_content, url):
         # New fields for advanced analysis
         'robots_txt': False,
         'sitemap_xml': False,
+        'sitemap': None,
+        'ai_crawler_access': {},
         'open_graph_tags': [],
         'twitter_card_tags': [],
         'canonical_tag': '',
@@ -248,20 +277,6 @@ def analyze_webpage_structure(html_content, url):
         'organization_schema': False
     }
 
-    # Check robots.txt and sitemap.xml presence (only for HTTP(S) URLs)
-    if url.startswith(('http://', 'https://')):
-        try:
-            parsed_url = urlparse(url)
-            base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            robots_resp = requests.get(urljoin(base_url, '/robots.txt'), timeout=5)
-            if robots_resp.status_code == 200 and 'User-agent' in robots_resp.text:
-                analysis['robots_txt'] = True
-            sitemap_resp = requests.get(urljoin(base_url, '/sitemap.xml'), timeout=5)
-            if sitemap_resp.status_code == 200 and ('<urlset' in sitemap_resp.text or '<sitemapindex' in sitemap_resp.text):
-                analysis['sitemap_xml'] = True
-        except Exception as e:
-            pass  # Don't fail analysis if these checks error
-
     # Open Graph and Twitter Card tags
     og_tags = soup.find_all('meta', attrs={'property': re.compile(r'^og:', re.I)})
     analysis['open_graph_tags'] = [tag.get('property') for tag in og_tags if tag.get('property')]
@@ -334,6 +349,8 @@ def analyze_webpage_structure(html_content, url):
     # Check for FAQ patterns
     faq_indicators = ['faq', 'frequently asked', 'questions', 'q&a', 'q & a']
     page_text = soup.get_text().lower()
+    if fetch_result is not None:
+        analysis['crawl_efficiency'] = crawl_efficiency(fetch_result, len(' '.join(page_text.split())))
     for indicator in faq_indicators:
         if indicator in page_text:
             analysis['faq_detected'] = True
@@ -353,15 +370,6 @@ def analyze_webpage_structure(html_content, url):
         except:
             pass
     
-    # Check for llms.txt file (only for HTTP(S) URLs)
-    if url.startswith(('http://', 'https://')):
-        try:
-            llms_resp = requests.get(urljoin(base_url, '/llms.txt'), timeout=5)
-            if llms_resp.status_code == 200:
-                analysis['llms_txt'] = True
-        except:
-            pass
-    
     # Count list elements for content structure
     analysis['definition_lists'] = len(soup.find_all('dl'))
     analysis['ordered_lists'] = len(soup.find_all('ol'))
@@ -370,27 +378,21 @@ def analyze_webpage_structure(html_content, url):
     # Add comprehensive content analysis
     analysis['content_analysis'] = content_analyzer.analyze_content(html_content, soup)
     
+    # Join the site-file probes
+    if site_probe:
+        analysis.update(site_probe.analysis_fields(url))
+    
     return analysis
 
-def generate_ai_content_summary(html_content, analysis):
+def generate_ai_content_summary(page, analysis):
     """Generate an AI's understanding summary of the content."""
     
     if not anthropic:
         # Provide fallback summary without AI
         return generate_fallback_content_summary(analysis)
     
-    # Extract clean text from HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Remove script and style elements
-    for script in soup(["script", "style"]):
-        script.decompose()
-    
-    # Get text content (limit to first 3000 chars for API efficiency)
-    text = soup.get_text()
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    clean_text = ' '.join(chunk for chunk in chunks if chunk)
+    # Clean text extracted once per request by the page artifact
+    clean_text = page.clean_text
     
     # Limit text length for API
     if len(clean_text) > 3000:
@@ -620,8 +622,10 @@ def generate_ai_recommendations(analysis):
     
     Technical SEO:
     - Robots.txt: {'Present' if analysis.get('robots_txt') else 'Missing'}
-    - Sitemap.xml: {'Present' if analysis.get('sitemap_xml') else 'Missing'}
+    - AI crawlers blocked from this page: {', '.join(blocked_agents(analysis.get('ai_crawler_access', {}), page_only=True)) or 'None'}
+    - Sitemap.xml: {describe_sitemap(analysis.get('sitemap'))}
     - Canonical tag: {'Present' if analysis.get('canonical_tag') else 'Missing'}
+    - Crawl efficiency: {describe_crawl_efficiency(analysis.get('crawl_efficiency'))}
     - Structured data (JSON-LD): {'Yes' if analysis['structured_data'] else 'No'}
     - Open Graph tags: {len(analysis.get('open_graph_tags', []))} found
     - Twitter Card tags: {len(analysis.get('twitter_card_tags', []))} found
@@ -725,6 +729,8 @@ def analyze():
     data = request.get_json()
     url = data.get('url', '').strip()
     competitor_urls = data.get('competitor_urls', [])
+    # Also render the page in the browser and diff it against the raw HTML
+    include_render_diff = bool(data.get('render_diff'))
     
     if not url:
         return jsonify({'error': 'Please provide a URL'}), 400
@@ -751,9 +757,10 @@ def analyze():
         )
         return jsonify({'error': error_msg}), 400
     
-    # Fetch webpage content
-    html_content = fetch_webpage_content(url)
-    if not html_content:
+    # Fetch webpage content once; every stage below shares this artifact
+    fetch_result = fetch_webpage(url)
+    page = PageArtifact.from_fetch_result(fetch_result)
+    if not page or not page.html:
         # Check if it's a file:// URL on the deployed version
         if url.startswith('file://') and not os.environ.get('FLASK_ENV', 'development') == 'development':
             error_msg = (
@@ -785,13 +792,40 @@ def analyze():
                 '• Open source project pages\n'
                 '• Educational websites'
             )
+            if fetch_result.error:
+                error_msg += f"\n\n**Fetch details:** {fetch_result.error}"
         return jsonify({'error': error_msg}), 400
     
-    # Analyze webpage structure
-    analysis = analyze_webpage_structure(html_content, url)
+    # The diff reads JSON-LD, so it runs before the analysis strips scripts
+    # from the shared tree
+    page_render_diff = None
+    if include_render_diff and url.startswith(('http://', 'https://')):
+        from render_diff import render_diff
+        page_render_diff = render_diff(url, page)
+    
+    # Analyze webpage structure, reusing the stored analysis when the
+    # server confirmed (304) that the page has not changed
+    http_cache = get_http_cache()
+    analysis = None
+    if fetch_result.from_cache:
+        analysis = http_cache.load_analysis(fetch_result.final_url, fetch_result.digest)
+        if analysis is not None:
+            # Site files and the fetch itself are not part of the page body; refresh them
+            analysis.update(probe_site_files(url).analysis_fields(url))
+            analysis['crawl_efficiency'] = crawl_efficiency(
+                fetch_result, analysis.get('crawl_efficiency', {}).get('text_chars', 0)
+            )
+    if analysis is None:
+        analysis = analyze_webpage_structure(page.html, url, soup=page.soup, fetch_result=fetch_result)
+        http_cache.store_analysis(fetch_result.final_url, fetch_result.digest, analysis)
+    
+    # Record how the page was fetched (cache hits, truncation reasons)
+    analysis['fetch'] = fetch_result.summary()
+    if page_render_diff is not None:
+        analysis['render_diff'] = page_render_diff
     
     # Generate AI content summary
-    ai_content_summary = generate_ai_content_summary(html_content, analysis)
+    ai_content_summary = generate_ai_content_summary(page, analysis)
     
     # Generate AI recommendations
     ai_recommendations = generate_ai_recommendations(analysis)
@@ -821,7 +855,7 @@ def analyze():
             analyzer = CompetitiveAnalyzer()
             # Include the main URL as the first result (your content)
             all_urls = [url] + clean_competitor_urls
-            competitive_results = analyzer.compare_urls(all_urls)
+            competitive_results = analyzer.compare_urls(all_urls, pages={url: page})
     
     # Generate unique ID for this result
     result_id = str(uuid.uuid4())
@@ -863,6 +897,23 @@ def analyze():
     
     return jsonify(response_data)
 
+@app.route('/render-diff', methods=['POST'])
+def render_diff_route():
+    """Compare a page's raw HTML with its browser-rendered DOM"""
+    from render_diff import render_diff
+    
+    data = request.get_json()
+    url = data.get('url', '').strip()
+    if not url:
+        return jsonify({'error': 'Please provide a URL'}), 400
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    
+    diff = render_diff(url)
+    if 'error' in diff:
+        return jsonify(diff), 502
+    return jsonify({'success': True, 'url': url, 'render_diff': diff, 'timestamp': datetime.now().isoformat()})
+
 def cleanup_old_results():
     """Remove results older than 24 hours or keep only the most recent 1000"""
     if len(stored_results) > 1000:
@@ -224,6 +224,52 @@ def analyze():
     
     return jsonify(response_data)
 
+@app.route('/analyze-site', methods=['POST'])
+@login_required
+@limiter.limit("5 per hour")
+def analyze_site_route():
+    """Whole-site analysis from the sitemap (bulk_analysis tier feature)"""
+    if 'bulk_analysis' not in TIER_LIMITS[current_user.tier]['features']:
+        return jsonify({
+            'error': 'Whole-site analysis is available on the Agency and Enterprise plans.',
+            'upgrade_url': url_for('pricing')
+        }), 403
+    
+    data = request.get_json()
+    url = data.get('url', '').strip()
+    if not url:
+        return jsonify({'error': 'Please provide a URL'}), 400
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    
+    from site_analyzer import clamp_max_pages, submit_site_analysis
+    try:
+        max_pages = clamp_max_pages(data.get('max_pages'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Crawls take minutes, so the job runs in the background and is polled
+    job_id = submit_site_analysis(url, max_pages, restart=bool(data.get('restart')),
+                                  incremental=bool(data.get('incremental')), owner=current_user.id)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('site_job_status', job_id=job_id),
+        'timestamp': datetime.now().isoformat()
+    }), 202
+
+@app.route('/analyze-site/<job_id>', methods=['GET'])
+@login_required
+def site_job_status(job_id):
+    """Progress of a site analysis job; the report is in 'summary' once complete"""
+    from crawl_frontier import get_frontier
+    
+    job = get_frontier().job(job_id)
+    if not job or job['params'].get('owner') != current_user.id:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
 @app.route('/api/analyze', methods=['POST'])
 @limiter.limit("10 per minute")
 def api_analyze():
@@ -0,0 +1,148 @@
+"""
+Batch analysis of a local directory of saved HTML
+Walks a directory tree lazily, reads at most FETCH_MAX_DECODED_BYTES of each
+page (the same cap as network bodies) and fans the analysis out across a
+process pool. Results are written as JSON lines
+as they complete, with a bounded number of pages in flight, so exports of
+hundreds of thousands of pages can be analyzed without holding them in memory.
+
+Usage:
+    python batch_analyzer.py ./site-export -o results.jsonl [--base-url https://example.com/]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urljoin
+
+from config import FETCH_SETTINGS
+from charset_resolver import decode_html
+
+HTML_EXTENSIONS = ('.html', '.htm', '.xhtml')
+# Pages queued per worker process; bounds memory independent of tree size
+IN_FLIGHT_PER_WORKER = 4
+
+
+def read_capped(file_path, max_bytes=None):
+    """Return (content, truncated) for a file, reading at most max_bytes of it
+
+    The decoder and parser need the page as one string, so the cap is what
+    bounds memory for oversized files.
+    """
+    if max_bytes is None:
+        max_bytes = FETCH_SETTINGS['max_decoded_bytes']
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        return file.read(max_bytes), size > max_bytes
+
+
+def iter_html_files(root):
+    """Yield paths of HTML files under root, depth-first, without listing the whole tree"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(HTML_EXTENSIONS):
+                        yield entry.path
+        except OSError as e:
+            print(f"Skipping {directory}: {e}", file=sys.stderr)
+
+
+def page_url(file_path, root, base_url=None):
+    """URL a page is analyzed under: base_url + relative path, or its file:// URL"""
+    if base_url:
+        relative = Path(file_path).relative_to(root).as_posix()
+        return urljoin(base_url if base_url.endswith('/') else base_url + '/', relative)
+    return Path(file_path).resolve().as_uri()
+
+
+def _init_worker():
+    # Import the app once per process, keeping its start-up output off stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        import app  # noqa: F401
+
+
+def analyze_file(file_path, root, base_url=None):
+    """Analyze one saved page; runs inside a worker process"""
+    from app import analyze_webpage_structure, calculate_ai_readiness_score
+    url = page_url(file_path, root, base_url)
+    try:
+        content, truncated = read_capped(file_path)
+        html_content, encoding, _ = decode_html(content)
+        analysis = analyze_webpage_structure(html_content, url, check_site_files=False)
+        score, score_breakdown = calculate_ai_readiness_score(analysis)
+        return {
+            'path': file_path,
+            'url': url,
+            'encoding': encoding,
+            'truncated': truncated,
+            'score': score,
+            'score_breakdown': score_breakdown,
+            'analysis': analysis
+        }
+    except Exception as e:
+        return {'path': file_path, 'url': url, 'error': str(e)}
+
+
+def analyze_directory(root, output, base_url=None, workers=None):
+    """Analyze every HTML file under root, writing one JSON line per page to output"""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+    pages = 0
+    errors = 0
+    pending = set()
+
+    def drain(block_until):
+        nonlocal pages, errors, pending
+        while len(pending) > block_until:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                output.write(json.dumps(result, default=str) + '\n')
+                pages += 1
+                if 'error' in result:
+                    errors += 1
+                if pages % 500 == 0:
+                    output.flush()
+                    print(f"{datetime.now().isoformat()} analyzed {pages} pages ({errors} errors)",
+                          file=sys.stderr)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for file_path in iter_html_files(root):
+            pending.add(pool.submit(analyze_file, file_path, root, base_url))
+            drain(max_in_flight - 1)
+        drain(0)
+    output.flush()
+    return {'pages': pages, 'errors': errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze a directory tree of saved HTML pages')
+    parser.add_argument('directory', help='Root of the saved site')
+    parser.add_argument('-o', '--output', default='-', help='JSONL output file (default: stdout)')
+    parser.add_argument('--base-url', help='Live URL the directory root corresponds to')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"{args.directory} is not a directory")
+
+    if args.output == '-':
+        summary = analyze_directory(args.directory, sys.stdout, args.base_url, args.workers)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            summary = analyze_directory(args.directory, output, args.base_url, args.workers)
+    print(f"Done: {summary['pages']} pages analyzed, {summary['errors']} errors", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
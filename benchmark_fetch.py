@@ -0,0 +1,231 @@
+"""
+Benchmark the HTTP/1.1 (requests) and HTTP/2 (httpx) fetch backends
+Fetches a page plus robots.txt, sitemap.xml and llms.txt per round, the same
+pattern /analyze produces for one origin, and reports per-round timings.
+
+By default local test servers are started: an HTTP/1.1 server for requests
+and a cleartext HTTP/2 (h2c) server for httpx, which talks to it with prior
+knowledge. Both add the same think time per request, so the run compares
+one multiplexed connection with a pool of HTTP/1.1 connections. Pass --url
+to benchmark a real origin instead; httpx then negotiates h2 over TLS where
+the origin offers it. The protocol each backend actually used is printed.
+
+Usage:
+    python benchmark_fetch.py [--rounds 50] [--url https://example.com/]
+"""
+
+import argparse
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin
+
+from fetch_client import FetchClient
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+PAGE_BODY = ('<html lang="en"><head><title>Benchmark</title></head><body>'
+             + '<p>Benchmark content.</p>' * 2000 + '</body></html>').encode('utf-8')
+SITE_FILE_BODIES = {
+    '/robots.txt': b'User-agent: *\nAllow: /\n',
+    '/sitemap.xml': b'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"></urlset>',
+    '/llms.txt': b'# Benchmark\n',
+}
+
+
+# Simulated server think time per request
+THINK_SECONDS = 0.005
+
+
+def response_for(path):
+    """Return (body, content_type) served for path"""
+    body = SITE_FILE_BODIES.get(path, PAGE_BODY)
+    return body, 'text/html; charset=utf-8' if body is PAGE_BODY else 'text/plain'
+
+
+class BenchmarkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body, content_type = response_for(self.path)
+        time.sleep(THINK_SECONDS)
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BenchmarkHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+class H2cServer:
+    """Minimal cleartext HTTP/2 server (prior knowledge only) built on h2
+
+    Each connection gets a reader thread; every stream is answered from its
+    own thread after the think time, so requests on one connection are
+    served concurrently like a real multiplexing server.
+    """
+
+    def __init__(self):
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def serve_forever(self):
+        while True:
+            try:
+                sock, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.handle, args=(sock,), daemon=True).start()
+
+    def handle(self, sock):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+        # Guards the connection state; responders wait on it for flow-control credit
+        condition = threading.Condition()
+        with condition:
+            connection.initiate_connection()
+            sock.sendall(connection.data_to_send())
+        try:
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                with condition:
+                    events = connection.receive_data(data)
+                    sock.sendall(connection.data_to_send())
+                    condition.notify_all()
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        path = dict(event.headers).get(':path', '/')
+                        threading.Thread(target=self.respond, daemon=True,
+                                         args=(sock, connection, condition, event.stream_id, path)).start()
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+    def respond(self, sock, connection, condition, stream_id, path):
+        body, content_type = response_for(path)
+        time.sleep(THINK_SECONDS)
+        with condition:
+            connection.send_headers(stream_id, [(':status', '200'), ('content-type', content_type),
+                                                ('content-length', str(len(body)))])
+            while body:
+                window = connection.local_flow_control_window(stream_id)
+                if window < 1:
+                    condition.wait(1)
+                    continue
+                size = min(window, connection.max_outbound_frame_size, len(body))
+                connection.send_data(stream_id, body[:size], end_stream=size == len(body))
+                body = body[size:]
+            sock.sendall(connection.data_to_send())
+
+    def shutdown(self):
+        self.sock.close()
+
+
+def http_version(response):
+    """Protocol a response arrived over, e.g. 'HTTP/1.1' or 'HTTP/2'"""
+    version = getattr(response, 'http_version', None)
+    if version:
+        return version
+    # requests exposes urllib3's numeric version (11 for HTTP/1.1)
+    return {10: 'HTTP/1.0', 11: 'HTTP/1.1'}.get(getattr(response.raw, 'version', None), 'unknown')
+
+
+def run_round(client, pool, page_url, versions=None):
+    """Fetch the page and the three site files concurrently, like /analyze"""
+    start = time.perf_counter()
+    futures = [pool.submit(client.get, page_url)]
+    futures += [pool.submit(client.probe, urljoin(page_url, path)) for path in SITE_FILE_BODIES]
+    for future in futures:
+        response = future.result()
+        response.content
+        if versions is not None:
+            versions.add(http_version(response))
+        response.close()
+    return time.perf_counter() - start
+
+
+def benchmark(backend, page_url, rounds, prior_knowledge=False):
+    client = FetchClient({'backend': backend, 'http_cache_enabled': False,
+                          'http2_prior_knowledge': prior_knowledge})
+    if client.backend != backend:
+        return None
+    pool = ThreadPoolExecutor(max_workers=4)
+    versions = set()
+    try:
+        run_round(client, pool, page_url, versions)  # warm up connections
+        timings = [run_round(client, pool, page_url) for _ in range(rounds)]
+    finally:
+        pool.shutdown()
+        client.close()
+    return {
+        'backend': backend,
+        'http_version': ', '.join(sorted(versions)),
+        'mean_ms': statistics.mean(timings) * 1000,
+        'p50_ms': statistics.median(timings) * 1000,
+        'p95_ms': sorted(timings)[int(len(timings) * 0.95) - 1] * 1000,
+        'total_s': sum(timings)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare fetch backends')
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--url', help='Benchmark against this page instead of a local server')
+    args = parser.parse_args()
+
+    servers = []
+    targets = {'requests': (args.url, False), 'httpx': (args.url, False)}
+    if not args.url:
+        server, page_url = start_local_server()
+        servers.append(server)
+        targets['requests'] = (page_url, False)
+        if H2_AVAILABLE:
+            h2c_server = H2cServer()
+            servers.append(h2c_server)
+            targets['httpx'] = (f"http://127.0.0.1:{h2c_server.port}/", True)
+        else:
+            print("h2 is not installed; httpx is benchmarked over HTTP/1.1")
+            targets['httpx'] = (page_url, False)
+
+    print(f"Benchmarking {args.rounds} rounds against {args.url or 'local servers'}")
+    print("=" * 60)
+    for backend in ('requests', 'httpx'):
+        page_url, prior_knowledge = targets[backend]
+        result = benchmark(backend, page_url, args.rounds, prior_knowledge)
+        if result is None:
+            print(f"{backend:>8}: unavailable")
+            continue
+        print(f"{backend:>8}: {result['http_version']}, mean {result['mean_ms']:.1f} ms, "
+              f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, total {result['total_s']:.2f} s")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 import os
+import atexit
+import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -7,10 +9,29 @@ from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import time
 
-def fetch_with_browser(url, wait_time=5):
-    """Fetch webpage content using a real browser to bypass anti-bot measures."""
-    
-    # Configure Chrome options
+from config import BROWSER_SETTINGS
+
+# Optional: used to recycle browsers that grow past the memory threshold
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+# Snapshot of DOM size and network activity, polled to detect readiness
+READINESS_PROBE_JS = """
+return [
+    document.readyState,
+    document.getElementsByTagName('*').length,
+    document.body ? document.body.textContent.length : 0,
+    performance.getEntriesByType('resource').length
+];
+"""
+
+
+def _chrome_options():
+    """Configure Chrome options"""
     chrome_options = Options()
     chrome_options.add_argument('--headless')  # Run in background
     chrome_options.add_argument('--no-sandbox')
@@ -21,34 +42,179 @@ def fetch_with_browser(url, wait_time=5):
     
     # Set a realistic user agent
     chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-    
-    try:
-        # Initialize the driver
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        # Navigate to the URL
-        driver.get(url)
-        
-        # Wait for the page to load
-        WebDriverWait(driver, wait_time).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Additional wait for JavaScript rendering
-        time.sleep(2)
-        
-        # Get the page source
-        html_content = driver.page_source
-        
-        # Close the driver
-        driver.quit()
-        
+    return chrome_options
+
+
+def wait_until_ready(driver, timeout, quiet_period=None):
+    """Wait for the load event, then for the DOM and network to go quiet
+
+    The page counts as ready once the element count, text length and number
+    of fetched resources have not changed for quiet_period seconds. Returns
+    early on a static page instead of sleeping a fixed amount.
+    """
+    if quiet_period is None:
+        quiet_period = BROWSER_SETTINGS['quiet_period']
+    deadline = time.monotonic() + timeout
+    last_snapshot = None
+    stable_since = time.monotonic()
+    while time.monotonic() < deadline:
+        snapshot = driver.execute_script(READINESS_PROBE_JS)
+        now = time.monotonic()
+        if snapshot != last_snapshot:
+            last_snapshot = snapshot
+            stable_since = now
+        elif snapshot[0] == 'complete' and now - stable_since >= quiet_period:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+class PooledBrowser:
+    """A long-lived Chrome instance plus its usage counters"""
+
+    def __init__(self):
+        self.driver = webdriver.Chrome(options=_chrome_options())
+        self.base_handle = self.driver.current_window_handle
+        self.pages = 0
+
+    def memory_mb(self):
+        """Resident memory of chromedriver and all Chrome processes, or None"""
+        if not PSUTIL_AVAILABLE:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(process.memory_info().rss for process in processes) / (1024 * 1024)
+        except Exception:
+            return None
+
+    def fetch(self, url, wait_time):
+        """Load url in a fresh tab and return the rendered HTML"""
+        driver = self.driver
+        driver.switch_to.new_window('tab')
+        try:
+            driver.set_page_load_timeout(wait_time + 30)
+            driver.get(url)
+            
+            # Wait for the page to load
+            WebDriverWait(driver, wait_time).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+            
+            # Wait for JavaScript rendering to settle
+            wait_until_ready(driver, wait_time)
+            
+            return driver.page_source
+        finally:
+            self.pages += 1
+            driver.close()
+            driver.switch_to.window(self.base_handle)
+            try:
+                # Don't leak cookies/session state between URLs
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            except Exception:
+                pass
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """Bounded pool of reusable headless browsers
+
+    Browsers are launched lazily up to pool_size and handed out one caller
+    at a time. A browser is recycled after max_pages pages, once its process
+    tree exceeds max_memory_mb, or after any error.
+    """
+
+    def __init__(self, size=None, max_pages=None, max_memory_mb=None):
+        self.size = size or BROWSER_SETTINGS['pool_size']
+        self.max_pages = max_pages or BROWSER_SETTINGS['max_pages']
+        self.max_memory_mb = max_memory_mb or BROWSER_SETTINGS['max_memory_mb']
+        self.idle = []
+        self.launched = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Return an idle browser, launching one if the pool has room"""
+        if timeout is None:
+            timeout = BROWSER_SETTINGS['acquire_timeout']
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while not self.idle and self.launched >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError('No browser available in the pool')
+                self.condition.wait(remaining)
+            if self.idle:
+                return self.idle.pop()
+            self.launched += 1
+        try:
+            return PooledBrowser()
+        except Exception:
+            self._retired()
+            raise
+
+    def _retired(self):
+        with self.condition:
+            self.launched -= 1
+            self.condition.notify()
+
+    def release(self, browser, healthy=True):
+        """Return a browser to the pool, or retire it if it is due for recycling"""
+        memory = browser.memory_mb()
+        if not healthy or browser.pages >= self.max_pages or (memory and memory > self.max_memory_mb):
+            browser.quit()
+            self._retired()
+            return
+        with self.condition:
+            self.idle.append(browser)
+            self.condition.notify()
+
+    def fetch(self, url, wait_time=5):
+        """Render url in a pooled browser and return its HTML"""
+        browser = self.acquire()
+        try:
+            html_content = browser.fetch(url, wait_time)
+        except Exception:
+            self.release(browser, healthy=False)
+            raise
+        self.release(browser)
         return html_content
-        
+
+    def close(self):
+        """Quit every idle browser"""
+        with self.condition:
+            browsers, self.idle = self.idle, []
+            self.launched -= len(browsers)
+        for browser in browsers:
+            browser.quit()
+
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Return the process-wide BrowserPool"""
+    global _browser_pool
+    if _browser_pool is None:
+        with _browser_pool_lock:
+            if _browser_pool is None:
+                _browser_pool = BrowserPool()
+                atexit.register(_browser_pool.close)
+    return _browser_pool
+
+
+def fetch_with_browser(url, wait_time=5):
+    """Fetch webpage content using a real browser to bypass anti-bot measures."""
+    try:
+        return get_browser_pool().fetch(url, wait_time)
     except Exception as e:
         print(f"Browser fetch error: {e}")
-        if 'driver' in locals():
-            driver.quit()
         return None
 
 def analyze_with_browser(url):
@@ -0,0 +1,273 @@
+"""
+HTTP record/replay cassettes for deterministic offline runs
+With FETCH_CASSETTE_MODE=record every request made through the shared
+FetchClient (page fetches, site-file and sitemap probes, competitive scrapes)
+is performed live and its status, headers, redirect hops, body, timing or
+error are written to a SQLite cassette. Streamed responses are recorded as
+the caller reads them, so only the bytes the fetch layer accepted are stored,
+along with the number of bytes that came off the wire. With
+FETCH_CASSETTE_MODE=replay the same requests are answered from the cassette
+without touching the network, optionally sleeping for the recorded time
+(scaled by FETCH_CASSETTE_LATENCY) so the /analyze pipeline can be
+benchmarked and profiled reproducibly.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import timedelta
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Request headers that would make the recorded response depend on local cache state
+CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since')
+# Response headers that no longer describe the stored (decoded) body
+STALE_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status_code INTEGER,
+    final_url TEXT,
+    headers TEXT,
+    history TEXT,
+    body BLOB,
+    elapsed REAL,
+    error_type TEXT,
+    error TEXT,
+    recorded_at REAL,
+    wire_bytes INTEGER
+)
+"""
+
+# Columns added after the first schema, for cassettes that predate them
+MIGRATIONS = [
+    ('wire_bytes', 'INTEGER'),
+]
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Raised in replay mode for a URL the cassette has no recording of"""
+
+
+class CassetteResponse:
+    """Replayed response exposing the parts of requests.Response the fetch layer uses"""
+
+    def __init__(self, url, status_code, headers, content=b'', history=None, elapsed=0.0, wire_bytes=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.history = history or []
+        self.elapsed = timedelta(seconds=elapsed)
+        self._content = content
+        self._consumed = 0
+        self._wire_bytes = wire_bytes
+        self.encoding = get_encoding_from_headers(self.headers) or 'utf-8'
+        # fetch_page calls response.raw.tell() for bytes read off the wire
+        self.raw = self
+
+    @property
+    def content(self):
+        self._consumed = len(self._content)
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def tell(self):
+        """Bytes read off the wire so far, scaled from the recorded transfer size"""
+        if self._wire_bytes is None or not self._content:
+            return self._consumed
+        if self._consumed >= len(self._content):
+            return self._wire_bytes
+        return self._wire_bytes * self._consumed // len(self._content)
+
+    def iter_content(self, chunk_size=None):
+        chunk_size = chunk_size or len(self._content) or 1
+        for start in range(0, len(self._content), chunk_size):
+            self._consumed = min(len(self._content), start + chunk_size)
+            yield self._content[start:start + chunk_size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+    def close(self):
+        pass
+
+
+class RecordingResponse:
+    """Live response that keeps the body chunks the caller reads and records them on close
+
+    Everything else is delegated to the underlying requests.Response, so the
+    fetch layer's content-type checks and size caps apply as in a live run.
+    """
+
+    def __init__(self, cassette_session, url, response, started):
+        self._cassette_session = cassette_session
+        self._url = url
+        self._response = response
+        self._started = started
+        self._chunks = []
+        self._size = 0
+        self._saved = False
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        limit = self._cassette_session.max_body
+        for chunk in self._response.iter_content(chunk_size=chunk_size):
+            if not limit or self._size < limit:
+                self._chunks.append(chunk)
+                self._size += len(chunk)
+            yield chunk
+
+    @property
+    def content(self):
+        content = self._response.content
+        self._chunks = [content]
+        return content
+
+    @property
+    def text(self):
+        self.content
+        return self._response.text
+
+    def close(self):
+        if not self._saved:
+            self._saved = True
+            self._cassette_session.save_recording(self._url, self._response, b''.join(self._chunks),
+                                                  time.monotonic() - self._started)
+        self._response.close()
+
+
+class Cassette:
+    """SQLite store of recorded responses keyed by request URL"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute(SCHEMA)
+            columns = {row[1] for row in self.connection.execute('PRAGMA table_info(responses)')}
+            for column, column_type in MIGRATIONS:
+                if column not in columns:
+                    self.connection.execute(f'ALTER TABLE responses ADD COLUMN {column} {column_type}')
+            self.connection.commit()
+
+    def save(self, url, status_code=None, final_url=None, headers=None, history=None,
+             body=b'', elapsed=0.0, error=None, wire_bytes=None):
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses (url, status_code, final_url, headers, history, body, '
+                'elapsed, error_type, error, recorded_at, wire_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, status_code, final_url, json.dumps(headers or {}), json.dumps(history or []),
+                 zlib.compress(body), elapsed,
+                 type(error).__name__ if error else None, str(error) if error else None,
+                 time.time(), wire_bytes)
+            )
+            self.connection.commit()
+
+    def load(self, url):
+        """Return the recorded row for url as a dict, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT status_code, final_url, headers, history, body, elapsed, error_type, error, wire_bytes '
+                'FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, final_url, headers, history, body, elapsed, error_type, error, wire_bytes = row
+        return {
+            'status_code': status_code,
+            'final_url': final_url,
+            'headers': json.loads(headers),
+            'history': json.loads(history),
+            'body': zlib.decompress(body),
+            'elapsed': elapsed,
+            'error_type': error_type,
+            'error': error,
+            'wire_bytes': wire_bytes
+        }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class CassetteSession:
+    """Session wrapper that records live responses or replays recorded ones"""
+
+    def __init__(self, session, cassette, mode, latency=0.0, max_body=None):
+        self.session = session
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+        self.max_body = max_body
+        self.headers = session.headers
+
+    def get(self, url, headers=None, timeout=None, allow_redirects=True, stream=False):
+        if self.mode == 'replay':
+            return self._replay(url)
+        return self._record(url, headers, timeout, allow_redirects, stream)
+
+    def _record(self, url, headers, timeout, allow_redirects, stream):
+        headers = {name: value for name, value in (headers or {}).items()
+                   if name.lower() not in CONDITIONAL_HEADERS}
+        started = time.monotonic()
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout,
+                                        allow_redirects=allow_redirects, stream=stream)
+        except requests.exceptions.RequestException as e:
+            self.cassette.save(url, elapsed=time.monotonic() - started, error=e)
+            raise
+        recording = RecordingResponse(self, url, response, started)
+        if not stream:
+            # requests has already read the whole body
+            recording.content
+            recording.close()
+        return recording
+
+    def save_recording(self, url, response, body, elapsed):
+        """Store a live response with the part of its body the caller read"""
+        stored_headers = {name: value for name, value in response.headers.items()
+                          if name.lower() not in STALE_HEADERS}
+        history = [
+            {'url': hop.url, 'status_code': hop.status_code, 'location': hop.headers.get('Location')}
+            for hop in response.history
+        ]
+        self.cassette.save(url, response.status_code, response.url, stored_headers, history,
+                           body[:self.max_body or None], elapsed, wire_bytes=response.raw.tell())
+
+    def _replay(self, url):
+        recorded = self.cassette.load(url)
+        if recorded is None:
+            raise CassetteMiss(f"No recorded response for {url} (cassette replay)")
+        if self.latency:
+            time.sleep(recorded['elapsed'] * self.latency)
+        if recorded['error_type']:
+            error_class = requests.exceptions.Timeout if 'Timeout' in recorded['error_type'] \
+                else requests.exceptions.ConnectionError
+            raise error_class(recorded['error'])
+        hops = [CassetteResponse(hop['url'], hop['status_code'], {'Location': hop['location'] or ''})
+                for hop in recorded['history']]
+        return CassetteResponse(recorded['final_url'] or url, recorded['status_code'], recorded['headers'],
+                                recorded['body'], hops, recorded['elapsed'], recorded['wire_bytes'])
+
+    def close(self):
+        self.session.close()
+        self.cassette.close()
@@ -0,0 +1,124 @@
+"""
+Character encoding resolution for fetched HTML
+Resolves the encoding cheaply from the HTTP header, then the BOM, then a
+<meta charset> declaration near the top of the document. Statistical
+detection only runs as a last resort, and only over a bounded prefix.
+"""
+
+import codecs
+import re
+
+# Optional statistical detectors (requests ships one of them)
+try:
+    from charset_normalizer import from_bytes as _normalizer_from_bytes
+except ImportError:
+    _normalizer_from_bytes = None
+
+try:
+    import chardet
+except ImportError:
+    chardet = None
+
+# How far into the document to look for <meta charset>
+META_SNIFF_BYTES = 4096
+# How much of the body statistical detection may look at
+DETECTION_PREFIX_BYTES = 64 * 1024
+
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w\-:.]+)', re.I)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w\-:.]+)', re.I)
+
+# Browsers treat these labels as windows-1252 (WHATWG Encoding Standard)
+ENCODING_ALIASES = {
+    'iso-8859-1': 'cp1252',
+    'latin1': 'cp1252',
+    'latin-1': 'cp1252',
+    'us-ascii': 'cp1252',
+    'ascii': 'cp1252',
+}
+
+
+def _normalize(label):
+    """Return a Python codec name for an encoding label, or None if unknown"""
+    if not label:
+        return None
+    label = label.strip().lower()
+    label = ENCODING_ALIASES.get(label, label)
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+
+def _from_header(content_type):
+    if not content_type:
+        return None
+    match = HEADER_CHARSET_RE.search(content_type)
+    return _normalize(match.group(1)) if match else None
+
+
+def _from_bom(content):
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    return None
+
+
+def _from_meta(content):
+    match = META_CHARSET_RE.search(content[:META_SNIFF_BYTES])
+    if not match:
+        return None
+    encoding = _normalize(match.group(1).decode('ascii', errors='ignore'))
+    # A document that was readable as ASCII cannot really be UTF-16/32
+    if encoding and encoding.startswith(('utf-16', 'utf-32')):
+        return 'utf-8'
+    return encoding
+
+
+def _detect(content):
+    prefix = content[:DETECTION_PREFIX_BYTES]
+    label = None
+    if _normalizer_from_bytes is not None:
+        best = _normalizer_from_bytes(prefix).best()
+        if best is not None:
+            label = best.encoding
+    elif chardet is not None:
+        label = chardet.detect(prefix).get('encoding')
+    return _normalize(label)
+
+
+def resolve_encoding(content, content_type=None):
+    """Return (encoding, source) for an HTML body
+
+    source is one of 'header', 'bom', 'meta', 'detected' or 'default'.
+    """
+    encoding = _from_header(content_type)
+    if encoding:
+        return encoding, 'header'
+    encoding = _from_bom(content)
+    if encoding:
+        return encoding, 'bom'
+    encoding = _from_meta(content)
+    if encoding:
+        return encoding, 'meta'
+    # An ASCII prefix gives detection nothing to work with; UTF-8 is the
+    # ASCII-compatible encoding the rest of the page most likely uses
+    if content[:DETECTION_PREFIX_BYTES].isascii():
+        return 'utf-8', 'default'
+    encoding = _detect(content)
+    if encoding:
+        return encoding, 'detected'
+    return 'utf-8', 'default'
+
+
+def decode_html(content, content_type=None):
+    """Decode an HTML body; returns (text, encoding, source)"""
+    encoding, source = resolve_encoding(content, content_type)
+    return content.decode(encoding, errors='replace'), encoding, source
@@ -5,9 +5,7 @@ Integrates with existing Flask app - copy this entire file to your VSC and share
 
 import os
 import re
-import requests
 from flask import Flask, render_template, request, jsonify, redirect, url_for
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
 from datetime import datetime
 from anthropic import Anthropic
@@ -16,6 +14,10 @@ import sys
 import uuid
 import json
 import time
+from fetch_client import get_fetch_client
+from charset_resolver import decode_html
+from crawl_scheduler import get_scheduler
+from page_artifact import PageArtifact
 
 # Load environment variables
 load_dotenv()
@@ -41,31 +43,14 @@ class CompetitiveAnalyzer:
     def scrape_url_content(self, url):
         """Scrape and clean content from URL"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive'
-            }
-            response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
+            response = get_fetch_client().get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script, style, nav, footer, header elements
-            for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
-                script.decompose()
-            
-            # Get text content
-            text = soup.get_text()
+            html, _, _ = decode_html(response.content, response.headers.get('Content-Type'))
+            page = PageArtifact(url, html, content=response.content)
             
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text[:10000]  # Limit content length for API efficiency
+            # Text without script, style, nav, footer, header and aside
+            return page.main_text[:10000]  # Limit content length for API efficiency
             
         except Exception as e:
             print(f"Error scraping {url}: {e}")
@@ -210,16 +195,24 @@ class CompetitiveAnalyzer:
             print(f"Error generating rewrites: {e}")
             return {"rewrites": [], "overall_strategy": "Unable to generate rewrites"}
     
-    def compare_urls(self, urls):
-        """Compare multiple URLs strategically"""
+    def compare_urls(self, urls, pages=None):
+        """Compare multiple URLs strategically
+        
+        pages maps URLs already fetched in this request to their PageArtifact,
+        so they are not fetched again.
+        """
         results = []
+        urls = [url for url in urls if url.strip()]
+        pages = pages or {}
         
-        for url in urls:
-            if not url.strip():
-                continue
-                
+        # Fetch each remaining URL once through the politeness scheduler:
+        # different sites in parallel, same-site requests paced per origin
+        to_fetch = [url for url in dict.fromkeys(urls) if url not in pages]
+        fetched = dict(zip(to_fetch, get_scheduler().map(self.scrape_url_content, to_fetch)))
+        contents = [pages[url].main_text[:10000] if url in pages else fetched[url] for url in urls]
+        
+        for url, content in zip(urls, contents):
             print(f"Analyzing: {url}")
-            content = self.scrape_url_content(url)
             if content.startswith("Error:"):
                 results.append({
                     'url': url,
@@ -237,9 +230,6 @@ class CompetitiveAnalyzer:
                 'analysis': analysis,
                 'content_preview': content[:200] + "..." if len(content) > 200 else content
             })
-            
-            # Add delay to avoid rate limiting
-            time.sleep(1)
         
         return results
     
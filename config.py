@@ -1,5 +1,7 @@
 """Configuration for AI Discoverability Analyzer"""
 import os
+import json
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -145,3 +147,129 @@ PRICING = {
         'display': 'Contact us'
     }
 }
+
+# Outbound fetch configuration (shared by every page/site-file fetch)
+FETCH_SETTINGS = {
+    # 'requests' (HTTP/1.1) or 'httpx' (HTTP/2, needs the h2 package)
+    'backend': os.environ.get('FETCH_BACKEND', 'requests'),
+    # httpx backend: speak HTTP/2 to plain http:// origins without an upgrade
+    # (h2c prior knowledge); only for servers known to support it
+    'http2_prior_knowledge': os.environ.get('FETCH_HTTP2_PRIOR_KNOWLEDGE', 'false').lower() in ['true', 'on', '1'],
+    # Number of distinct hosts that keep a connection pool
+    'pool_connections': int(os.environ.get('FETCH_POOL_CONNECTIONS', 20)),
+    # Maximum keep-alive connections retained per host
+    'pool_maxsize': int(os.environ.get('FETCH_POOL_MAXSIZE', 10)),
+    # Block instead of opening extra connections once a host pool is full
+    'pool_block': os.environ.get('FETCH_POOL_BLOCK', 'false').lower() in ['true', 'on', '1'],
+    'page_timeout': float(os.environ.get('FETCH_PAGE_TIMEOUT', 15)),
+    'probe_timeout': float(os.environ.get('FETCH_PROBE_TIMEOUT', 5)),
+    # Adaptive per-origin timeouts: percentile of recent time-to-headers
+    # samples x multiplier (p95 for connect, p99 for read), within bounds;
+    # the fixed timeouts above apply until an origin has min_samples
+    'adaptive_timeouts': os.environ.get('FETCH_ADAPTIVE_TIMEOUTS', 'true').lower() in ['true', 'on', '1'],
+    'timeout_multiplier': float(os.environ.get('FETCH_TIMEOUT_MULTIPLIER', 4.0)),
+    'connect_timeout_min': float(os.environ.get('FETCH_CONNECT_TIMEOUT_MIN', 2)),
+    'connect_timeout_max': float(os.environ.get('FETCH_CONNECT_TIMEOUT_MAX', 10)),
+    'read_timeout_min': float(os.environ.get('FETCH_READ_TIMEOUT_MIN', 3)),
+    'read_timeout_max': float(os.environ.get('FETCH_READ_TIMEOUT_MAX', 45)),
+    'latency_window': int(os.environ.get('FETCH_LATENCY_WINDOW', 50)),  # samples per origin
+    'latency_min_samples': int(os.environ.get('FETCH_LATENCY_MIN_SAMPLES', 5)),
+    'latency_cache_size': int(os.environ.get('FETCH_LATENCY_CACHE_SIZE', 5000)),  # origins
+    # Worker threads for concurrent robots.txt/sitemap.xml/llms.txt probes
+    'probe_workers': int(os.environ.get('FETCH_PROBE_WORKERS', 12)),
+    # Per-origin cache of site-file probe results
+    'site_file_cache_ttl': int(os.environ.get('SITE_FILE_CACHE_TTL', 3600)),  # seconds
+    'site_file_cache_size': int(os.environ.get('SITE_FILE_CACHE_SIZE', 1000)),  # origins
+    # Disk-backed HTTP revalidation cache (ETag / Last-Modified) for pages
+    'http_cache_enabled': os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1'],
+    'http_cache_dir': os.environ.get('HTTP_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ai_analyzer_http_cache')),
+    # Least recently used entries are pruned beyond either limit
+    'http_cache_max_bytes': int(os.environ.get('HTTP_CACHE_MAX_BYTES', 500 * 1024 * 1024)),
+    'http_cache_max_entries': int(os.environ.get('HTTP_CACHE_MAX_ENTRIES', 20000)),
+    # Streaming page fetch limits
+    'allowed_content_types': os.environ.get('FETCH_ALLOWED_CONTENT_TYPES', 'text/html,application/xhtml+xml').split(','),
+    'max_body_bytes': int(os.environ.get('FETCH_MAX_BODY_BYTES', 5 * 1024 * 1024)),  # on the wire
+    'max_decoded_bytes': int(os.environ.get('FETCH_MAX_DECODED_BYTES', 10 * 1024 * 1024)),  # after decompression
+    'oversize_policy': os.environ.get('FETCH_OVERSIZE_POLICY', 'truncate'),  # 'truncate' or 'reject'
+    # Backoff for origins that answered 403/429/503 or timed out
+    'backoff_base': int(os.environ.get('FETCH_BACKOFF_BASE', 30)),  # seconds, doubled per failure
+    'backoff_max': int(os.environ.get('FETCH_BACKOFF_MAX', 3600)),
+    'retry_after_max': int(os.environ.get('FETCH_RETRY_AFTER_MAX', 86400)),
+    'backoff_cache_size': int(os.environ.get('FETCH_BACKOFF_CACHE_SIZE', 5000)),  # origins
+    # Per-origin politeness for bulk and competitive fetches
+    'scheduler_workers': int(os.environ.get('FETCH_SCHEDULER_WORKERS', 16)),
+    'host_concurrency': int(os.environ.get('FETCH_HOST_CONCURRENCY', 2)),
+    'host_rate': float(os.environ.get('FETCH_HOST_RATE', 1.0)),  # request starts per second
+    # Per-host overrides, e.g. {"example.com": {"concurrency": 4, "rate": 5}}
+    'host_limits': json.loads(os.environ.get('FETCH_HOST_LIMITS', '{}')),
+    # Remember resolved redirect chains per input URL and skip them on refetch
+    'redirect_memo_ttl': int(os.environ.get('FETCH_REDIRECT_MEMO_TTL', 3600)),
+    'redirect_memo_size': int(os.environ.get('FETCH_REDIRECT_MEMO_SIZE', 10000)),  # URLs
+    # 'off', 'record' (live requests saved to the cassette) or 'replay' (no network)
+    'cassette_mode': os.environ.get('FETCH_CASSETTE_MODE', 'off').lower(),
+    'cassette_path': os.environ.get('FETCH_CASSETTE_PATH', 'fetch_cassette.sqlite3'),
+    # Replay sleeps for recorded time x this factor (0 = as fast as possible)
+    'cassette_latency': float(os.environ.get('FETCH_CASSETTE_LATENCY', 0)),
+}
+
+# Headless browser pool used by browser_analyzer
+BROWSER_SETTINGS = {
+    'pool_size': int(os.environ.get('BROWSER_POOL_SIZE', 2)),
+    # Recycle a browser after this many pages...
+    'max_pages': int(os.environ.get('BROWSER_MAX_PAGES', 50)),
+    # ...or once its process tree uses more than this (needs psutil)
+    'max_memory_mb': int(os.environ.get('BROWSER_MAX_MEMORY_MB', 1024)),
+    # Page is ready once DOM and network activity are quiet this long
+    'quiet_period': float(os.environ.get('BROWSER_QUIET_PERIOD', 0.5)),
+    'acquire_timeout': float(os.environ.get('BROWSER_ACQUIRE_TIMEOUT', 30)),
+    # Escalate JS-shell / challenge pages from the static fetch to the browser
+    'render_escalation': os.environ.get('BROWSER_RENDER_ESCALATION', 'true').lower() in ['true', 'on', '1'],
+    # How long to remember that an origin needs rendering (only escalations are
+    # cached; static-only origins are re-checked on every fetch)
+    'render_decision_ttl': int(os.environ.get('BROWSER_RENDER_DECISION_TTL', 86400)),
+    'render_decision_cache_size': int(os.environ.get('BROWSER_RENDER_DECISION_CACHE_SIZE', 5000)),
+}
+
+# Streaming sitemap parsing (sitemap_parser)
+SITEMAP_SETTINGS = {
+    # Protocol limit for one uncompressed sitemap file
+    'max_bytes': int(os.environ.get('SITEMAP_MAX_BYTES', 50 * 1024 * 1024)),
+    # Follow nested sitemap indexes this many levels deep
+    'max_depth': int(os.environ.get('SITEMAP_MAX_DEPTH', 3)),
+    # Stop after reading this many sitemap files from one site
+    'max_files': int(os.environ.get('SITEMAP_MAX_FILES', 50)),
+    # URL entries scanned for the counts/coverage/staleness in page analyses
+    'summary_max_urls': int(os.environ.get('SITEMAP_SUMMARY_MAX_URLS', 50000)),
+    # Budget for the sitemap summary in single-page analyses (files read, seconds)
+    'probe_max_files': int(os.environ.get('SITEMAP_PROBE_MAX_FILES', 3)),
+    'probe_seconds': float(os.environ.get('SITEMAP_PROBE_SECONDS', 5)),
+}
+
+# Sitemap-driven whole-site analysis (site_analyzer, bulk_analysis tier feature)
+SITE_ANALYSIS_SETTINGS = {
+    'max_pages': int(os.environ.get('SITE_MAX_PAGES', 5000)),
+    # Site analyses started from web requests run in the background, this
+    # many at a time per process
+    'max_jobs': int(os.environ.get('SITE_MAX_JOBS', 2)),
+    # Site crawls get their own scheduler: more workers and a faster pace
+    # per origin than interactive fetches (FETCH_HOST_LIMITS still apply)
+    'workers': int(os.environ.get('SITE_WORKERS', 16)),
+    'host_concurrency': int(os.environ.get('SITE_HOST_CONCURRENCY', 8)),
+    'host_rate': float(os.environ.get('SITE_HOST_RATE', 20.0)),
+    # Pages skipped while their origin backs off (403/429/503/timeouts) are
+    # requeued after the backoff window, at most this many times each
+    'backoff_retries': int(os.environ.get('SITE_BACKOFF_RETRIES', 5)),
+    # Skip pages robots.txt disallows for this user-agent token
+    'respect_robots': os.environ.get('SITE_RESPECT_ROBOTS', 'true').lower() in ['true', 'on', '1'],
+    'robots_agent': os.environ.get('SITE_ROBOTS_AGENT', 'AIDiscoverabilityAnalyzer'),
+    # How many lowest-scoring pages and failures to list in the report
+    'worst_pages': int(os.environ.get('SITE_REPORT_WORST_PAGES', 20)),
+    # Resumable crawl frontier (crawl_frontier.py): state is checkpointed
+    # every checkpoint_every results or checkpoint_interval seconds
+    'frontier_path': os.environ.get('SITE_FRONTIER_PATH', os.path.join(tempfile.gettempdir(), 'ai_analyzer_frontier.sqlite3')),
+    'checkpoint_every': int(os.environ.get('SITE_CHECKPOINT_EVERY', 500)),
+    'checkpoint_interval': float(os.environ.get('SITE_CHECKPOINT_INTERVAL', 5.0)),
+    # Internal link graph (link_graph.py)
+    'pagerank_damping': float(os.environ.get('SITE_PAGERANK_DAMPING', 0.85)),
+    'pagerank_iterations': int(os.environ.get('SITE_PAGERANK_ITERATIONS', 50)),
+}
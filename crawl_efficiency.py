@@ -0,0 +1,117 @@
+"""
+Crawl-efficiency audit of a fetched page
+Crawlers spend a budget of time and bytes per site; slow first bytes,
+uncompressed or uncacheable HTML, redirect chains and markup-heavy pages all
+shrink how much of a site they get through. This audit reads only what the
+fetch layer already recorded on the FetchResult (timings, wire and decoded
+sizes, response headers, redirect hops), so it costs no extra requests.
+"""
+
+import re
+
+from requests.structures import CaseInsensitiveDict
+
+# Thresholds for the recommendations
+SLOW_TTFB_SECONDS = 0.8
+COMPRESSIBLE_BYTES = 10 * 1024  # HTML smaller than this gains little from compression
+LOW_TEXT_RATIO = 0.1  # visible text / decoded HTML bytes
+HEAVY_HTML_BYTES = 500 * 1024
+
+MAX_AGE_RE = re.compile(r'(?:s-)?max-age\s*=\s*(\d+)', re.I)
+
+
+def _cache_policy(headers):
+    cache_control = headers.get('Cache-Control', '')
+    directives = {part.strip().split('=', 1)[0].lower() for part in cache_control.split(',') if part.strip()}
+    max_age = MAX_AGE_RE.search(cache_control)
+    return {
+        'cache_control': cache_control or None,
+        'max_age': int(max_age.group(1)) if max_age else None,
+        'no_store': 'no-store' in directives,
+        'etag': bool(headers.get('ETag')),
+        'last_modified': bool(headers.get('Last-Modified')),
+        'expires': headers.get('Expires'),
+        'age': headers.get('Age'),
+        # Validators let crawlers revalidate with a cheap 304
+        'revalidatable': bool(headers.get('ETag') or headers.get('Last-Modified'))
+    }
+
+
+def crawl_efficiency(fetch_result, text_chars):
+    """Build the crawl-efficiency section for one fetch
+
+    text_chars is the length of the page's visible text, used to report how
+    much of the HTML is markup rather than content.
+    """
+    headers = CaseInsensitiveDict(fetch_result.headers or {})
+    decoded_bytes = len(fetch_result.content or b'')
+    transfer_bytes = fetch_result.transfer_bytes
+    encoding = (headers.get('Content-Encoding') or '').strip().lower() or None
+    cache = _cache_policy(headers)
+    text_ratio = round(text_chars / decoded_bytes, 3) if decoded_bytes else None
+
+    section = {
+        'measured': fetch_result.ttfb is not None,
+        'fetch_tier': fetch_result.fetch_tier,
+        'from_cache': fetch_result.from_cache,
+        'ttfb_ms': round(fetch_result.ttfb * 1000) if fetch_result.ttfb is not None else None,
+        'download_ms': round(fetch_result.download_seconds * 1000)
+        if fetch_result.download_seconds is not None else None,
+        'transfer_bytes': transfer_bytes,
+        'decoded_bytes': decoded_bytes,
+        'content_encoding': encoding,
+        'compression_ratio': round(decoded_bytes / transfer_bytes, 2)
+        if transfer_bytes and encoding else None,
+        'cache': cache,
+        'redirect_hops': len(fetch_result.redirects),
+        'redirects_memoized': fetch_result.redirects_memoized,
+        'text_chars': text_chars,
+        'text_to_html_ratio': text_ratio,
+        'recommendations': []
+    }
+    if not section['measured']:
+        # Rendered or offline pages: no wire-level data to judge
+        return section
+
+    recommendations = section['recommendations']
+    if fetch_result.ttfb > SLOW_TTFB_SECONDS:
+        recommendations.append({
+            'task': f"Reduce time to first byte ({section['ttfb_ms']} ms)",
+            'impact': 'Crawlers fetch fewer pages per visit from slow servers'
+        })
+    if not encoding and not fetch_result.from_cache and decoded_bytes >= COMPRESSIBLE_BYTES:
+        recommendations.append({
+            'task': f"Enable gzip or brotli compression ({decoded_bytes // 1024} KB sent uncompressed)",
+            'impact': 'Compressed HTML typically transfers 70-80% fewer bytes per crawl'
+        })
+    if not cache['revalidatable'] or cache['no_store']:
+        recommendations.append({
+            'task': 'Send ETag or Last-Modified and avoid Cache-Control: no-store',
+            'impact': 'Lets crawlers revalidate unchanged pages with a cheap 304 response'
+        })
+    if decoded_bytes >= HEAVY_HTML_BYTES:
+        recommendations.append({
+            'task': f"Trim the HTML payload ({decoded_bytes // 1024} KB)",
+            'impact': 'Very large documents may be truncated by AI crawlers'
+        })
+    elif text_ratio is not None and text_ratio < LOW_TEXT_RATIO:
+        recommendations.append({
+            'task': f"Reduce markup overhead (only {text_ratio:.0%} of the HTML is visible text)",
+            'impact': 'Inline scripts, styles and wrapper markup cost crawl bytes without adding content'
+        })
+    return section
+
+
+def describe_crawl_efficiency(section):
+    """One-line summary of the section for the recommendations prompt"""
+    if not section or not section.get('measured'):
+        return 'Not measured'
+    parts = [f"TTFB {section['ttfb_ms']} ms"]
+    if section['transfer_bytes'] is not None:
+        parts.append(f"{section['transfer_bytes'] / 1024:.1f} KB transferred / {section['decoded_bytes'] / 1024:.1f} KB HTML")
+    parts.append(f"compression: {section['content_encoding'] or 'none'}")
+    parts.append('cache validators: ' + ('yes' if section['cache']['revalidatable'] else 'no'))
+    parts.append(f"{section['redirect_hops']} redirect hops")
+    if section['text_to_html_ratio'] is not None:
+        parts.append(f"text is {section['text_to_html_ratio']:.0%} of HTML")
+    return ', '.join(parts)
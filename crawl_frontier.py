@@ -0,0 +1,259 @@
+"""
+Resumable crawl frontier for long-running site analyses
+Persists each job's URLs with their state (pending, in-flight, done, failed)
+and the compact per-page result in SQLite. State changes are buffered in
+memory and written in one transaction per checkpoint (every N results or T
+seconds), so checkpointing 100k URLs costs a few hundred small batched
+writes. A restarted job reloads its finished pages instead of refetching
+them, and URLs that were in flight when it stopped go back to pending.
+Completed jobs keep their per-page records, sitemap lastmod values and the
+report's aggregate state, which an incremental re-run starts from. A job
+submitted to run in the background is 'preparing' until its URL list is
+known, then 'running', and ends 'complete' or 'failed'.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import SITE_ANALYSIS_SETTINGS
+
+PENDING, IN_FLIGHT, DONE, FAILED = 0, 1, 2, 3
+STATE_NAMES = {PENDING: 'pending', IN_FLIGHT: 'in_flight', DONE: 'done', FAILED: 'failed'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT,
+    summary TEXT,
+    report_state TEXT,
+    created_at REAL,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    job_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    state INTEGER NOT NULL,
+    result TEXT,
+    lastmod TEXT,
+    PRIMARY KEY (job_id, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS jobs_site ON jobs (site, status);
+"""
+
+# Columns added after the first schema, for frontier files that predate them
+MIGRATIONS = [
+    ('jobs', 'report_state', 'TEXT'),
+    ('urls', 'lastmod', 'TEXT'),
+]
+
+
+class CrawlFrontier:
+    """SQLite-backed job and URL state store with buffered checkpoints"""
+
+    def __init__(self, path=None, checkpoint_every=None, checkpoint_interval=None):
+        self.path = path or SITE_ANALYSIS_SETTINGS['frontier_path']
+        self.checkpoint_every = checkpoint_every or SITE_ANALYSIS_SETTINGS['checkpoint_every']
+        self.checkpoint_interval = checkpoint_interval or SITE_ANALYSIS_SETTINGS['checkpoint_interval']
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.pending_updates = {}  # (job_id, url) -> (state, result)
+        self.last_checkpoint = time.monotonic()
+        with self.lock:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.executescript(SCHEMA)
+            for table, column, column_type in MIGRATIONS:
+                columns = {row[1] for row in self.connection.execute(f'PRAGMA table_info({table})')}
+                if column not in columns:
+                    self.connection.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+            self.connection.commit()
+
+    def create_job(self, site, urls=None, params=None):
+        """Register a new job with its frontier; returns the job id
+
+        urls is an iterable of URLs or a dict of URL -> sitemap lastmod.
+        Without urls the job is created as 'preparing' and started later
+        with start_job.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                'INSERT INTO jobs (id, site, status, params, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, site, 'preparing', json.dumps(params or {}), now, now)
+            )
+            self.connection.commit()
+        if urls is not None:
+            self.start_job(job_id, urls, params)
+        return job_id
+
+    def start_job(self, job_id, urls, params=None):
+        """Store a preparing job's frontier and mark it running"""
+        lastmods = urls if isinstance(urls, dict) else {}
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO urls (job_id, url, state, lastmod) VALUES (?, ?, ?, ?)',
+                ((job_id, url, PENDING, lastmods.get(url)) for url in urls)
+            )
+            self.connection.execute(
+                "UPDATE jobs SET status = 'running', params = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(params or {}), time.time(), job_id)
+            )
+            self.connection.commit()
+
+    def latest_complete_job(self, site):
+        """Return (job_id, report_state) of the site's last finished job, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id, report_state FROM jobs WHERE site = ? AND status = 'complete' "
+                "AND report_state IS NOT NULL ORDER BY created_at DESC LIMIT 1",
+                (site,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def carry_forward(self, job_id, previous_job_id):
+        """Mark pages whose sitemap lastmod is unchanged since previous_job_id as done
+
+        Their earlier records are copied inside SQLite, without decoding them.
+        Returns the set of carried URLs.
+        """
+        with self.lock:
+            self.connection.execute(
+                'UPDATE urls SET state = ?, result = ('
+                '  SELECT previous.result FROM urls AS previous'
+                '  WHERE previous.job_id = ? AND previous.url = urls.url) '
+                'WHERE job_id = ? AND lastmod IS NOT NULL AND EXISTS ('
+                '  SELECT 1 FROM urls AS previous WHERE previous.job_id = ? AND previous.url = urls.url'
+                '  AND previous.state = ? AND previous.lastmod = urls.lastmod)',
+                (DONE, previous_job_id, job_id, previous_job_id, DONE)
+            )
+            self.connection.commit()
+            return {url for (url,) in self.connection.execute(
+                'SELECT url FROM urls WHERE job_id = ? AND state = ?', (job_id, DONE)
+            )}
+
+    def records(self, job_id):
+        """Return {url: record} for the pages a job completed"""
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT url, result FROM urls WHERE job_id = ? AND state = ?', (job_id, DONE)
+            ).fetchall()
+        return {url: json.loads(result) for url, result in rows}
+
+    def find_incomplete_job(self, site):
+        """Return the id of the most recent unfinished job for site, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id FROM jobs WHERE site = ? AND status IN ('preparing', 'running') "
+                "ORDER BY created_at DESC LIMIT 1",
+                (site,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def job(self, job_id):
+        """Return {'id', 'site', 'status', 'params', 'summary', 'counts'} or None"""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT id, site, status, params, summary FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(self.connection.execute(
+                'SELECT state, COUNT(*) FROM urls WHERE job_id = ? GROUP BY state', (job_id,)
+            ).fetchall())
+        return {
+            'id': row[0],
+            'site': row[1],
+            'status': row[2],
+            'params': json.loads(row[3] or '{}'),
+            'summary': json.loads(row[4]) if row[4] else None,
+            'counts': {name: counts.get(state, 0) for state, name in STATE_NAMES.items()}
+        }
+
+    def resume(self, job_id, load_finished=True):
+        """Prepare a job for (re)running
+
+        Returns (pending_urls, finished) where finished is a list of
+        (url, state, result) for pages that are already done or failed
+        (empty when load_finished is False).
+        """
+        with self.lock:
+            self.connection.execute(
+                'UPDATE urls SET state = ? WHERE job_id = ? AND state = ?', (PENDING, job_id, IN_FLIGHT)
+            )
+            self.connection.commit()
+            pending = [url for (url,) in self.connection.execute(
+                'SELECT url FROM urls WHERE job_id = ? AND state = ?', (job_id, PENDING)
+            )]
+            finished = [(url, state, json.loads(result) if result else None)
+                        for url, state, result in self.connection.execute(
+                            'SELECT url, state, result FROM urls WHERE job_id = ? AND state IN (?, ?)',
+                            (job_id, DONE, FAILED))] if load_finished else []
+        return pending, finished
+
+    def mark(self, job_id, url, state, result=None):
+        """Buffer a state change; written at the next checkpoint"""
+        with self.lock:
+            self.pending_updates[(job_id, url)] = (state, result)
+            due = (len(self.pending_updates) >= self.checkpoint_every
+                   or time.monotonic() - self.last_checkpoint >= self.checkpoint_interval)
+        if due:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write all buffered state changes in one transaction"""
+        with self.lock:
+            updates = self.pending_updates
+            self.pending_updates = {}
+            self.last_checkpoint = time.monotonic()
+            if not updates:
+                return
+            self.connection.executemany(
+                'UPDATE urls SET state = ?, result = ? WHERE job_id = ? AND url = ?',
+                ((state, json.dumps(result, separators=(',', ':')) if result is not None else None, job_id, url)
+                 for (job_id, url), (state, result) in updates.items())
+            )
+            self.connection.execute('UPDATE jobs SET updated_at = ? WHERE id IN ({})'.format(
+                ','.join('?' * len({job_id for job_id, _ in updates}))
+            ), (time.time(), *{job_id for job_id, _ in updates}))
+            self.connection.commit()
+
+    def fail(self, job_id, error):
+        """Mark a job that stopped with an error as failed"""
+        self.checkpoint()
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET status = 'failed', summary = ?, updated_at = ? WHERE id = ?",
+                (json.dumps({'error': error}), time.time(), job_id)
+            )
+            self.connection.commit()
+
+    def finish(self, job_id, summary, report_state=None):
+        """Flush outstanding changes and store the job's final report"""
+        self.checkpoint()
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET status = 'complete', summary = ?, report_state = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(summary, default=str), json.dumps(report_state) if report_state else None,
+                 time.time(), job_id)
+            )
+            self.connection.commit()
+
+
+_frontier = None
+_frontier_lock = threading.Lock()
+
+
+def get_frontier():
+    """Return the process-wide CrawlFrontier"""
+    global _frontier
+    if _frontier is None:
+        with _frontier_lock:
+            if _frontier is None:
+                _frontier = CrawlFrontier()
+    return _frontier
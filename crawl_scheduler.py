@@ -0,0 +1,189 @@
+"""
+Per-origin politeness scheduler for multi-URL work
+Every bulk and competitive fetch is dispatched through OriginScheduler, which
+caps concurrent requests and request starts per second for each origin while
+letting different origins proceed in parallel. Limits are configurable per
+host and back off automatically when an origin answers 429.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from config import FETCH_SETTINGS
+from fetch_client import get_origin
+from origin_backoff import origin_failures
+
+# Slowest pace a throttled origin is pushed down to (seconds between starts)
+MAX_INTERVAL = 60.0
+
+
+class _OriginState:
+    """Queue and pacing state for one origin"""
+
+    def __init__(self, concurrency, rate):
+        self.max_concurrency = max(1, concurrency)
+        self.concurrency = self.max_concurrency
+        self.base_interval = 1.0 / rate if rate > 0 else 0.0
+        self.interval = self.base_interval
+        self.next_start = 0.0
+        self.active = 0
+        self.queue = deque()
+        self.throttled_at = None
+
+    def throttle(self, delay):
+        """Halve concurrency, double the interval and pause for delay seconds"""
+        now = time.monotonic()
+        self.concurrency = max(1, self.concurrency // 2)
+        self.interval = min(MAX_INTERVAL, max(self.interval * 2, self.base_interval, 0.5))
+        self.next_start = max(self.next_start, now + delay)
+        self.throttled_at = now
+
+    def recover(self):
+        """Step back toward the configured limits after a quiet period"""
+        if self.throttled_at is None:
+            return
+        if time.monotonic() - self.throttled_at < max(10 * self.interval, 10):
+            return
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+        self.interval = max(self.base_interval, self.interval / 2)
+        if self.concurrency == self.max_concurrency and self.interval == self.base_interval:
+            self.throttled_at = None
+        else:
+            self.throttled_at = time.monotonic()
+
+
+class OriginScheduler:
+    """Dispatch callables keyed by URL under per-origin concurrency and rate limits
+
+    Tasks wait in per-origin queues; only tasks whose origin has a free slot
+    and whose pacing interval has elapsed are handed to the worker pool, so
+    a slow or throttled origin never occupies workers other origins need.
+    """
+
+    def __init__(self, max_workers=None, concurrency=None, rate=None, host_limits=None):
+        self.default_concurrency = FETCH_SETTINGS['host_concurrency'] if concurrency is None else concurrency
+        self.default_rate = FETCH_SETTINGS['host_rate'] if rate is None else rate
+        self.host_limits = FETCH_SETTINGS['host_limits'] if host_limits is None else host_limits
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or FETCH_SETTINGS['scheduler_workers'],
+            thread_name_prefix='origin-scheduler'
+        )
+        self.states = {}
+        self.condition = threading.Condition()
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, name='origin-dispatcher', daemon=True)
+        self.dispatcher.start()
+        origin_failures.add_listener(self._on_failure)
+
+    def _limits_for(self, url):
+        hostname = (urlparse(url).hostname or '').lower()
+        for host in (hostname, hostname[4:] if hostname.startswith('www.') else None):
+            if host and host in self.host_limits:
+                limits = self.host_limits[host]
+                return (limits.get('concurrency', self.default_concurrency),
+                        limits.get('rate', self.default_rate))
+        return self.default_concurrency, self.default_rate
+
+    def _state(self, origin, url):
+        state = self.states.get(origin)
+        if state is None:
+            state = _OriginState(*self._limits_for(url))
+            self.states[origin] = state
+        return state
+
+    def _on_failure(self, origin, status_code, delay):
+        """Adapt an origin's pace when it answers 429 Too Many Requests"""
+        if status_code != 429:
+            return
+        with self.condition:
+            state = self.states.get(origin)
+            if state is not None:
+                state.throttle(delay)
+                self.condition.notify()
+
+    def pause(self, url, seconds):
+        """Hold back new starts for url's origin for the next seconds"""
+        with self.condition:
+            state = self._state(get_origin(url), url)
+            state.next_start = max(state.next_start, time.monotonic() + seconds)
+            self.condition.notify()
+
+    def submit(self, url, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) under url's origin limits; returns a Future"""
+        future = Future()
+        origin = get_origin(url)
+        with self.condition:
+            self._state(origin, url).queue.append((future, fn, args, kwargs))
+            self.condition.notify()
+        return future
+
+    def map(self, fn, urls):
+        """Run fn(url) for each URL under the limits; results keep input order"""
+        futures = [self.submit(url, fn, url) for url in urls]
+        return [future.result() for future in futures]
+
+    def _run(self, origin, future, fn, args, kwargs):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self.condition:
+                state = self.states[origin]
+                state.active -= 1
+                state.recover()
+                self.condition.notify()
+
+    def _dispatch_loop(self):
+        while True:
+            with self.condition:
+                wait = None
+                now = time.monotonic()
+                for origin, state in self.states.items():
+                    while state.queue and state.active < state.concurrency:
+                        if now < state.next_start:
+                            delay = state.next_start - now
+                            wait = delay if wait is None else min(wait, delay)
+                            break
+                        future, fn, args, kwargs = state.queue.popleft()
+                        state.active += 1
+                        state.next_start = now + state.interval
+                        self.executor.submit(self._run, origin, future, fn, args, kwargs)
+                # Forget idle origins that are running at their configured pace
+                idle = [origin for origin, state in self.states.items()
+                        if not state.queue and not state.active
+                        and state.throttled_at is None and now >= state.next_start]
+                for origin in idle:
+                    del self.states[origin]
+                self.condition.wait(timeout=wait)
+
+    def stats(self):
+        """Return {origin: {active, queued, concurrency, interval}} for inspection"""
+        with self.condition:
+            return {
+                origin: {
+                    'active': state.active,
+                    'queued': len(state.queue),
+                    'concurrency': state.concurrency,
+                    'interval': round(state.interval, 3)
+                }
+                for origin, state in self.states.items()
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide OriginScheduler"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = OriginScheduler()
+    return _scheduler
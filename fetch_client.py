@@ -0,0 +1,395 @@
+"""
+Shared HTTP fetch client for AI Discoverability Analyzer
+One pooled, keep-alive session per process so page fetches and site-file
+probes to the same origin reuse connections instead of re-handshaking.
+Page fetches revalidate against the disk HTTP cache when possible.
+"""
+
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+
+from config import FETCH_SETTINGS, SITEMAP_SETTINGS
+from http_cache import get_http_cache, body_digest
+from charset_resolver import decode_html
+from origin_backoff import origin_failures
+from http2_backend import HttpxSession
+from redirect_memo import redirect_memo, redirect_hops
+from cassette import Cassette, CassetteSession
+from host_latency import host_latency
+
+# Browser-like headers used for page fetches
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+
+# Responses that put an origin into backoff
+BACKOFF_STATUS_CODES = {
+    403: 'Access forbidden (403)',
+    429: 'Rate limited (429)',
+    503: 'Service unavailable (503)'
+}
+
+
+class OriginBackoffError(requests.exceptions.RequestException):
+    """Raised instead of fetching from an origin that is backing off"""
+
+    def __init__(self, message, retry_in=None):
+        super().__init__(message)
+        self.retry_in = retry_in  # seconds until the backoff window ends
+
+
+def get_origin(url):
+    """Return scheme://host[:port] for an HTTP(S) URL"""
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+class FetchResult:
+    """Outcome of a page fetch: decoded text plus what the fetch layer saw"""
+
+    def __init__(self, url, final_url=None, status_code=None, headers=None,
+                 content=b'', text=None, encoding=None, encoding_source=None,
+                 from_cache=False, error=None, truncated_reason=None):
+        self.url = url
+        self.final_url = final_url or url
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+        self.text = text
+        self.encoding = encoding
+        # How the encoding was resolved: header, bom, meta, detected or default
+        self.encoding_source = encoding_source
+        # True when the server answered 304 and the stored body was served
+        self.from_cache = from_cache
+        self.error = error
+        # Set when the body hit a size cap and only a prefix was kept
+        self.truncated_reason = truncated_reason
+        # 'static' or 'rendered' (headless browser), see tiered_fetch
+        self.fetch_tier = 'static'
+        self.render_reason = None
+        # Redirects between the requested URL and final_url, see redirect_memo
+        self.redirects = []
+        self.redirects_memoized = False
+        # Instrumentation for the crawl-efficiency audit (None when not observed)
+        self.ttfb = None  # seconds from request to response headers
+        self.download_seconds = None
+        self.transfer_bytes = None  # body bytes on the wire, before decompression
+        # Seconds until the origin's backoff window ends, when the fetch was
+        # skipped because of it
+        self.retry_in = None
+        self._digest = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.text is not None
+
+    @property
+    def digest(self):
+        """sha256 of the body, used to key derived analysis"""
+        if self._digest is None and self.content:
+            self._digest = body_digest(self.content)
+        return self._digest
+
+    def summary(self):
+        """Small JSON-safe description of the fetch for the analysis"""
+        return {
+            'final_url': self.final_url,
+            'status_code': self.status_code,
+            'encoding': self.encoding,
+            'encoding_source': self.encoding_source,
+            'from_cache': self.from_cache,
+            'error': self.error,
+            'truncated': self.truncated_reason is not None,
+            'truncated_reason': self.truncated_reason,
+            'fetch_tier': self.fetch_tier,
+            'render_reason': self.render_reason,
+            'redirect_count': len(self.redirects),
+            'redirects': self.redirects,
+            'redirects_memoized': self.redirects_memoized
+        }
+
+
+class FetchClient:
+    """Thread-safe wrapper around a pooled requests.Session"""
+
+    def __init__(self, settings=None):
+        self.settings = dict(FETCH_SETTINGS)
+        if settings:
+            self.settings.update(settings)
+        self.session = self._build_session()
+
+    def _build_session(self):
+        """Create the transport session, wrapped for cassette record/replay if enabled"""
+        session = self._build_transport()
+        mode = self.settings['cassette_mode']
+        if mode in ('record', 'replay'):
+            print(f"Fetch cassette {mode} mode: {self.settings['cassette_path']}")
+            return CassetteSession(session, Cassette(self.settings['cassette_path']), mode,
+                                   latency=self.settings['cassette_latency'],
+                                   max_body=max(self.settings['max_decoded_bytes'],
+                                                SITEMAP_SETTINGS['max_bytes']))
+        return session
+
+    def _build_transport(self):
+        """Create the session for the configured backend
+
+        'requests' mounts per-host HTTP/1.1 connection pools; 'httpx' uses a
+        multiplexed HTTP/2 client and falls back to requests if httpx or h2
+        is not installed.
+        """
+        if self.settings['backend'] == 'httpx':
+            try:
+                self.backend = 'httpx'
+                return HttpxSession(self.settings, DEFAULT_HEADERS)
+            except ImportError as e:
+                print(f"HTTP/2 backend unavailable ({e}); using requests")
+        self.backend = 'requests'
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.settings['pool_connections'],
+            pool_maxsize=self.settings['pool_maxsize'],
+            pool_block=self.settings['pool_block']
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        return session
+
+    def get(self, url, timeout=None, headers=None, record_failures=True, forbidden_backoff=True, **kwargs):
+        """GET a URL through the shared pool
+
+        Without an explicit timeout the origin's adaptive (connect, read)
+        timeout is used, falling back to the page timeout. Fails fast
+        with OriginBackoffError while the origin is in a backoff window.
+        With record_failures, 403/429/503 answers and timeouts extend that
+        window and a successful answer clears it. Without forbidden_backoff
+        a 403 is left to the caller as a failure of that one URL.
+        """
+        origin = get_origin(url)
+        backoff = origin_failures.check(origin)
+        if backoff:
+            reason, remaining = backoff
+            raise OriginBackoffError(f"{origin} recently failed ({reason}); retry in {int(remaining) + 1}s",
+                                     retry_in=remaining)
+
+        if timeout is None:
+            timeout = host_latency.timeout_for(origin, self.settings['page_timeout'])
+        kwargs.setdefault('allow_redirects', True)
+        started = time.monotonic()
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+        except requests.exceptions.Timeout:
+            host_latency.record(origin, max(timeout) if isinstance(timeout, tuple) else timeout, timed_out=True)
+            if record_failures:
+                origin_failures.record_failure(origin, 'Timed out')
+            raise
+        # Time to response headers (the body is read later when streaming)
+        host_latency.record(origin, time.monotonic() - started)
+
+        if record_failures:
+            if response.status_code in BACKOFF_STATUS_CODES and (forbidden_backoff or response.status_code != 403):
+                origin_failures.record_failure(
+                    origin, BACKOFF_STATUS_CODES[response.status_code],
+                    retry_after=response.headers.get('Retry-After'),
+                    status_code=response.status_code
+                )
+            elif response.status_code < 400:
+                origin_failures.record_success(origin)
+        return response
+
+    def probe(self, url, timeout=None, **kwargs):
+        """GET a small site file (robots.txt, sitemap.xml, llms.txt)
+
+        A missing or forbidden site file says nothing about the page, so
+        probes honor an origin's backoff but never start one.
+        """
+        if timeout is None:
+            timeout = host_latency.timeout_for(get_origin(url), self.settings['probe_timeout'])
+        return self.get(url, timeout=timeout, record_failures=False, **kwargs)
+
+    def _content_type_error(self, content_type):
+        """Return a rejection reason if the Content-Type is not HTML, else None"""
+        if not content_type:
+            return None  # Unknown type; let the parser decide
+        if 'application/pdf' in content_type:
+            print(f"PDF detected via Content-Type header: {content_type}")
+            return 'PDF content'
+        mime_type = content_type.split(';')[0].strip()
+        if mime_type not in self.settings['allowed_content_types']:
+            return f"Unsupported content type: {mime_type}"
+        return None
+
+    def _read_body(self, response):
+        """Stream the body while enforcing the wire and decompressed byte caps
+
+        Returns (content, oversize_reason). The reason is None when the whole
+        body was read.
+        """
+        max_body = self.settings['max_body_bytes']
+        max_decoded = self.settings['max_decoded_bytes']
+
+        declared_length = response.headers.get('Content-Length')
+        if declared_length and declared_length.isdigit() and int(declared_length) > max_body \
+                and self.settings['oversize_policy'] == 'reject':
+            return b'', f"Content-Length {declared_length} exceeds the {max_body} byte limit"
+
+        chunks = []
+        decoded_size = 0
+        reason = None
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            decoded_size += len(chunk)
+            if response.raw.tell() > max_body:
+                reason = f"Body exceeds the {max_body} byte transfer limit"
+                break
+            if decoded_size > max_decoded:
+                reason = f"Body exceeds the {max_decoded} byte decompressed limit"
+                break
+        content = b''.join(chunks)
+        if reason:
+            content = content[:max_decoded]
+        return content, reason
+
+    def fetch_page(self, url, forbidden_backoff=True):
+        """Fetch an HTML page, going straight to its memoized redirect target
+
+        A URL whose redirect chain was resolved recently is fetched at its
+        final URL; if that shortcut fails the chain is resolved again from
+        the original URL. Redirect hops are recorded on the result either way.
+        forbidden_backoff is passed to get().
+        """
+        memo = redirect_memo.get(url)
+        if memo:
+            result = self._fetch(memo['final_url'], forbidden_backoff)
+            if result.ok:
+                result.url = url
+                result.redirects = memo['hops'] + result.redirects
+                result.redirects_memoized = True
+                return result
+            redirect_memo.forget(url)
+
+        result = self._fetch(url, forbidden_backoff)
+        if result.ok:
+            redirect_memo.remember(url, result.final_url, result.redirects)
+        return result
+
+    def _fetch(self, url, forbidden_backoff=True):
+        """Fetch an HTML page, revalidating against the HTTP cache
+
+        The body is streamed: non-HTML responses are rejected from their
+        headers alone, and bodies over the configured byte caps are truncated
+        or rejected according to oversize_policy. Bodies are cached under the
+        final (post-redirect) URL. Returns a FetchResult; failures are
+        reported through result.error.
+        """
+        http_cache = get_http_cache()
+        cached_meta = http_cache.lookup(url)
+        response = None
+        try:
+            started = time.monotonic()
+            response = self.get(url, headers=http_cache.conditional_headers(cached_meta), stream=True,
+                                forbidden_backoff=forbidden_backoff)
+            ttfb = time.monotonic() - started
+            if response.status_code == 304 and cached_meta:
+                response.close()
+                content = http_cache.load_body(url)
+                if content is not None:
+                    encoding = cached_meta.get('encoding') or 'utf-8'
+                    result = FetchResult(
+                        url, final_url=response.url, status_code=304,
+                        headers=dict(response.headers), content=content,
+                        text=content.decode(encoding, errors='replace'),
+                        encoding=encoding, encoding_source=cached_meta.get('encoding_source'),
+                        from_cache=True
+                    )
+                    result.redirects = redirect_hops(response)
+                    result.ttfb = ttfb
+                    result.transfer_bytes = 0
+                    return result
+                # Body went missing from disk; refetch unconditionally
+                started = time.monotonic()
+                response = self.get(url, stream=True, forbidden_backoff=forbidden_backoff)
+                ttfb = time.monotonic() - started
+            response.raise_for_status()
+
+            # Check the Content-Type before downloading anything
+            content_type = response.headers.get('Content-Type', '').lower()
+            error = self._content_type_error(content_type)
+            if error:
+                return FetchResult(url, final_url=response.url, status_code=response.status_code,
+                                   headers=dict(response.headers), error=error)
+
+            body_started = time.monotonic()
+            content, oversize_reason = self._read_body(response)
+            download_seconds = time.monotonic() - body_started
+            transfer_bytes = response.raw.tell()
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 403:
+                print(f"Access forbidden (403) for URL: {url}")
+                error = 'Access forbidden (403)'
+            else:
+                print(f"HTTP Error fetching URL: {e}")
+                error = f"HTTP error {e.response.status_code}"
+            return FetchResult(url, status_code=e.response.status_code, error=error)
+        except OriginBackoffError as e:
+            print(f"Skipping {url}: {e}")
+            result = FetchResult(url, error=str(e))
+            result.retry_in = e.retry_in
+            return result
+        except Exception as e:
+            print(f"Error fetching URL: {e}")
+            return FetchResult(url, error=str(e))
+        finally:
+            # Returns the connection to the pool, or drops it if the body
+            # was abandoned part-way
+            if response is not None:
+                response.close()
+
+        if oversize_reason:
+            print(f"Oversized response from {url}: {oversize_reason}")
+            if self.settings['oversize_policy'] == 'reject':
+                return FetchResult(url, final_url=response.url, status_code=response.status_code,
+                                   headers=dict(response.headers), error=oversize_reason)
+
+        text, encoding, encoding_source = decode_html(content, content_type)
+        result = FetchResult(
+            url, final_url=response.url, status_code=response.status_code,
+            headers=dict(response.headers), content=content,
+            text=text, encoding=encoding, encoding_source=encoding_source,
+            truncated_reason=oversize_reason
+        )
+        result.redirects = redirect_hops(response)
+        result.ttfb = ttfb
+        result.download_seconds = download_seconds
+        result.transfer_bytes = transfer_bytes
+        if not oversize_reason:
+            http_cache.store(response.url, response.headers, content,
+                             encoding=encoding, encoding_source=encoding_source)
+        return result
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_fetch_client():
+    """Return the process-wide FetchClient, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = FetchClient()
+    return _client
@@ -0,0 +1,95 @@
+"""
+Adaptive per-origin fetch timeouts
+Keeps a rolling window of time-to-headers samples for each origin and derives
+(connect, read) timeouts from its latency percentiles, clamped to configured
+bounds. Fast origins get tight timeouts so a hung connection fails in seconds;
+origins that are known to be slow get room to answer. Until an origin has
+enough samples the caller's default timeout is used. A timeout is recorded as
+a sample at the timeout that expired, so repeated timeouts widen the window
+up to the upper bound instead of cutting a slow origin off every time.
+"""
+
+import threading
+from collections import OrderedDict, deque
+
+from config import FETCH_SETTINGS
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+class HostLatencyTracker:
+    """Thread-safe LRU of origin -> recent latency samples"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or FETCH_SETTINGS
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def record(self, origin, seconds, timed_out=False):
+        with self.lock:
+            entry = self.entries.pop(origin, None)
+            if entry is None:
+                entry = {
+                    'samples': deque(maxlen=self.settings['latency_window']),
+                    'requests': 0,
+                    'timeouts': 0
+                }
+            entry['samples'].append(seconds)
+            entry['requests'] += 1
+            if timed_out:
+                entry['timeouts'] += 1
+            self.entries[origin] = entry
+            while len(self.entries) > self.settings['latency_cache_size']:
+                self.entries.popitem(last=False)
+
+    def _sorted_samples(self, origin):
+        with self.lock:
+            entry = self.entries.get(origin)
+            if not entry or len(entry['samples']) < self.settings['latency_min_samples']:
+                return None
+            return sorted(entry['samples'])
+
+    def timeout_for(self, origin, default):
+        """Return (connect, read) timeouts for origin, or default when it has too few samples"""
+        if not self.settings['adaptive_timeouts']:
+            return default
+        samples = self._sorted_samples(origin)
+        if samples is None:
+            return default
+        factor = self.settings['timeout_multiplier']
+        connect = _clamp(percentile(samples, 0.95) * factor,
+                         self.settings['connect_timeout_min'], self.settings['connect_timeout_max'])
+        read = _clamp(percentile(samples, 0.99) * factor,
+                      self.settings['read_timeout_min'], self.settings['read_timeout_max'])
+        return round(connect, 2), round(read, 2)
+
+    def snapshot(self):
+        """Return {origin: {samples, requests, timeouts, p50, p90, p99, timeout}} for inspection"""
+        with self.lock:
+            entries = [(origin, sorted(entry['samples']), entry['requests'], entry['timeouts'])
+                       for origin, entry in self.entries.items()]
+        return {
+            origin: {
+                'samples': len(samples),
+                'requests': requests,
+                'timeouts': timeouts,
+                'p50': round(percentile(samples, 0.5), 3),
+                'p90': round(percentile(samples, 0.9), 3),
+                'p99': round(percentile(samples, 0.99), 3),
+                'timeout': self.timeout_for(origin, None)
+            }
+            for origin, samples, requests, timeouts in entries
+        }
+
+
+host_latency = HostLatencyTracker()
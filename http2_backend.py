@@ -0,0 +1,106 @@
+"""
+Optional HTTP/2 fetch backend built on httpx
+Selected with FETCH_BACKEND=httpx. One httpx.Client with HTTP/2 enabled lets
+the page, robots.txt, sitemap.xml and llms.txt for an origin share a single
+multiplexed connection. Responses are wrapped so the rest of the fetch layer
+can treat them like requests.Response objects.
+"""
+
+import requests
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+
+class HttpxResponse:
+    """Adapter exposing the parts of requests.Response the fetch layer uses"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.history = [HttpxResponse(hop) for hop in response.history]
+        self.http_version = response.http_version
+        # fetch_page calls response.raw.tell() for bytes read off the wire
+        self.raw = self
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    @property
+    def text(self):
+        self._response.read()
+        return self._response.text
+
+    @property
+    def elapsed(self):
+        return self._response.elapsed
+
+    def tell(self):
+        return self._response.num_bytes_downloaded
+
+    def iter_content(self, chunk_size=None):
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+    def close(self):
+        self._response.close()
+
+
+class HttpxSession:
+    """Minimal requests.Session stand-in backed by an HTTP/2 httpx.Client"""
+
+    def __init__(self, settings, headers):
+        if not HTTPX_AVAILABLE:
+            raise ImportError('httpx is not installed')
+        if not H2_AVAILABLE:
+            raise ImportError('h2 is not installed (pip install h2)')
+        limits = httpx.Limits(
+            max_connections=settings['pool_connections'] * settings['pool_maxsize'],
+            max_keepalive_connections=settings['pool_connections'] * settings['pool_maxsize']
+        )
+        # Let httpx advertise only the encodings it can actually decode
+        headers = {name: value for name, value in headers.items()
+                   if name.lower() not in ('accept-encoding', 'connection')}
+        # Prior knowledge drops HTTP/1.1, so http:// origins get h2c directly
+        self.client = httpx.Client(http1=not settings['http2_prior_knowledge'], http2=True,
+                                   limits=limits, headers=headers)
+        self.headers = self.client.headers
+
+    def get(self, url, headers=None, timeout=None, allow_redirects=True, stream=False):
+        if isinstance(timeout, tuple):
+            # requests-style (connect, read)
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        request = self.client.build_request('GET', url, headers=headers, timeout=timeout)
+        try:
+            response = self.client.send(request, stream=stream, follow_redirects=allow_redirects)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        return HttpxResponse(response)
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,228 @@
+"""
+Disk-backed HTTP revalidation cache for AI Discoverability Analyzer
+Stores page bodies with their validators (ETag / Last-Modified) so refetches
+can be conditional. On 304 Not Modified the stored body is served and any
+analysis already derived from it can be reused. The cache is capped by total
+size and entry count; least recently used entries are pruned first.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from config import FETCH_SETTINGS
+
+
+# Files that make up one cache entry
+ENTRY_SUFFIXES = ('body', 'meta.json', 'analysis.json')
+
+
+def _key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def body_digest(content):
+    """Stable fingerprint of a response body"""
+    return hashlib.sha256(content).hexdigest()
+
+
+class HttpCache:
+    """URL-keyed store of {meta.json, body, analysis.json} files
+
+    Each entry lives under <directory>/<sha256(url)[:2]>/<sha256(url)>.*
+    and is written atomically, so concurrent workers never see partial files.
+    """
+
+    def __init__(self, directory=None, enabled=None, max_bytes=None, max_entries=None):
+        self.directory = directory or FETCH_SETTINGS['http_cache_dir']
+        self.enabled = FETCH_SETTINGS['http_cache_enabled'] if enabled is None else enabled
+        self.max_bytes = FETCH_SETTINGS['http_cache_max_bytes'] if max_bytes is None else max_bytes
+        self.max_entries = FETCH_SETTINGS['http_cache_max_entries'] if max_entries is None else max_entries
+        self.lock = threading.Lock()
+        # key -> bytes on disk, least recently used first; built on first write
+        self.index = None
+        self.total_bytes = 0
+
+    def _path(self, url, suffix):
+        return self._key_path(_key(url), suffix)
+
+    def _key_path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], f"{key}.{suffix}")
+
+    def _load_index(self):
+        """Scan the cache directory once, ordering entries by modification time
+
+        Called with the lock held. Other processes sharing the directory
+        keep their own index, so the limits are enforced per process.
+        """
+        if self.index is not None:
+            return
+        entries = {}  # key -> [size, mtime]
+        try:
+            for bucket in os.scandir(self.directory):
+                if not bucket.is_dir():
+                    continue
+                for entry in os.scandir(bucket.path):
+                    if entry.name.startswith('.tmp-'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    totals = entries.setdefault(entry.name.split('.', 1)[0], [0, 0])
+                    totals[0] += stat.st_size
+                    totals[1] = max(totals[1], stat.st_mtime)
+        except OSError:
+            pass
+        self.index = OrderedDict(
+            (key, size) for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1])
+        )
+        self.total_bytes = sum(self.index.values())
+
+    def _entry_size(self, key):
+        size = 0
+        for suffix in ENTRY_SUFFIXES:
+            try:
+                size += os.path.getsize(self._key_path(key, suffix))
+            except OSError:
+                pass
+        return size
+
+    def _track(self, url):
+        """Record url's entry as most recently used and prune over the limits (lock held)"""
+        self._load_index()
+        key = _key(url)
+        self.total_bytes -= self.index.pop(key, 0)
+        size = self._entry_size(key)
+        self.index[key] = size
+        self.total_bytes += size
+        while self.index and (len(self.index) > self.max_entries or self.total_bytes > self.max_bytes):
+            oldest, oldest_size = self.index.popitem(last=False)
+            self.total_bytes -= oldest_size
+            for suffix in ENTRY_SUFFIXES:
+                try:
+                    os.remove(self._key_path(oldest, suffix))
+                except OSError:
+                    pass
+
+    def _touch(self, url):
+        """Mark url's entry as recently used"""
+        with self.lock:
+            if self.index is not None and _key(url) in self.index:
+                self.index.move_to_end(_key(url))
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def lookup(self, url):
+        """Return the stored metadata for url, or None"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(url, 'meta.json'), 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        self._touch(url)
+        return meta
+
+    def load_body(self, url):
+        """Return the stored body bytes for url, or None"""
+        try:
+            with open(self._path(url, 'body'), 'rb') as body_file:
+                return body_file.read()
+        except OSError:
+            return None
+
+    def conditional_headers(self, meta):
+        """Build If-None-Match / If-Modified-Since headers from stored metadata"""
+        headers = {}
+        if not meta:
+            return headers
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url, headers, content, encoding=None, encoding_source=None):
+        """Store a 200 response body if it carries a validator and may be stored"""
+        if not self.enabled:
+            return
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not (etag or last_modified):
+            return
+        if 'no-store' in headers.get('Cache-Control', '').lower():
+            return
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': headers.get('Content-Type', ''),
+            'encoding': encoding,
+            'encoding_source': encoding_source,
+            'digest': body_digest(content)
+        }
+        try:
+            with self.lock:
+                self._write_atomic(self._path(url, 'body'), content)
+                self._write_atomic(self._path(url, 'meta.json'), json.dumps(meta).encode('utf-8'))
+                self._track(url)
+        except OSError as e:
+            print(f"HTTP cache write failed for {url}: {e}")
+
+    def load_analysis(self, url, digest):
+        """Return the analysis stored for url if it was derived from this body"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(url, 'analysis.json'), 'r', encoding='utf-8') as analysis_file:
+                stored = json.load(analysis_file)
+        except (OSError, ValueError):
+            return None
+        if stored.get('digest') != digest:
+            return None
+        return stored.get('analysis')
+
+    def store_analysis(self, url, digest, analysis):
+        """Remember the analysis derived from the body with this digest"""
+        if not self.enabled or not digest:
+            return
+        # Only keep analysis for bodies we can later revalidate
+        meta = self.lookup(url)
+        if not meta or meta.get('digest') != digest:
+            return
+        try:
+            data = json.dumps({'digest': digest, 'analysis': analysis}, default=str)
+            with self.lock:
+                self._write_atomic(self._path(url, 'analysis.json'), data.encode('utf-8'))
+                self._track(url)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"HTTP cache analysis write failed for {url}: {e}")
+
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """Return the process-wide HttpCache"""
+    global _http_cache
+    if _http_cache is None:
+        with _http_cache_lock:
+            if _http_cache is None:
+                _http_cache = HttpCache()
+    return _http_cache
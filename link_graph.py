@@ -0,0 +1,240 @@
+"""
+Internal link graph for whole-site analysis
+Pages get integer node IDs and their internal links are kept as flat edge
+arrays, compacted into CSR form (offsets + targets) once the crawl is done.
+From that graph the site report gets each page's in-degree, click depth from
+the home page and a PageRank importance score, and the sitemap pages no
+internal link path reaches (orphans). numpy speeds up PageRank on large sites
+when installed; the pure-Python path produces the same numbers.
+"""
+
+from array import array
+from collections import deque
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from config import SITE_ANALYSIS_SETTINGS
+
+# Optional: vectorized PageRank for sites with millions of edges
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+def node_key(url):
+    """Identity of a page in the graph: host without www., path and query
+
+    Ignores the scheme, fragment and a trailing slash, so http/https,
+    www/bare and /page vs /page/ variants of a URL are the same node.
+    """
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    port = f":{parsed.port}" if parsed.port else ''
+    return f"{host}{port}{parsed.path.rstrip('/') or '/'}" + (f"?{parsed.query}" if parsed.query else '')
+
+
+def internal_links(soup, base_url):
+    """Absolute, fragment-free URLs of the same-site links on a page (deduplicated)"""
+    site = node_key(base_url).split('/', 1)[0]
+    links = {}
+    for anchor in soup.find_all('a', href=True):
+        href = anchor['href'].strip()
+        if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+            continue
+        target = urldefrag(urljoin(base_url, href))[0]
+        if not target.startswith(('http://', 'https://')):
+            continue
+        if node_key(target).split('/', 1)[0] == site:
+            links.setdefault(target, None)
+    return list(links)
+
+
+class LinkGraph:
+    """Directed internal link graph with integer node IDs"""
+
+    def __init__(self):
+        self.ids = {}  # node_key -> node id
+        self.url_ids = {}  # exact URL -> node id, skips re-parsing repeated links
+        self.urls = []  # node id -> crawled or sitemap URL, else the first link seen
+        self.sources = array('l')
+        self.targets = array('l')
+        self.crawled = set()  # node ids whose outgoing links are known
+        self._csr = None
+
+    def node(self, url, canonical=False):
+        """Node id for url, added on first sight
+
+        With canonical, url becomes the node's reported URL, replacing
+        whichever link spelling reached the page first.
+        """
+        node_id = self.url_ids.get(url)
+        if node_id is None:
+            key = node_key(url)
+            node_id = self.ids.get(key)
+            if node_id is None:
+                node_id = self.ids[key] = len(self.urls)
+                self.urls.append(url)
+            self.url_ids[url] = node_id
+        if canonical:
+            self.urls[node_id] = url
+        return node_id
+
+    def add_page(self, url, links):
+        """Record a crawled page and its outgoing internal links"""
+        source = self.node(url, canonical=True)
+        self.crawled.add(source)
+        seen = set()
+        for link in links:
+            target = self.node(link)
+            if target != source and target not in seen:
+                seen.add(target)
+                self.sources.append(source)
+                self.targets.append(target)
+        self._csr = None
+
+    def csr(self):
+        """Return (offsets, targets): node u links to targets[offsets[u]:offsets[u + 1]]"""
+        if self._csr is None:
+            count = len(self.urls)
+            offsets = array('l', [0]) * (count + 1)
+            for source in self.sources:
+                offsets[source + 1] += 1
+            for node_id in range(count):
+                offsets[node_id + 1] += offsets[node_id]
+            position = array('l', offsets[:-1]) if count else array('l')
+            targets = array('l', [0]) * len(self.targets)
+            for source, target in zip(self.sources, self.targets):
+                targets[position[source]] = target
+                position[source] += 1
+            self._csr = (offsets, targets)
+        return self._csr
+
+    def in_degrees(self):
+        degrees = array('l', [0]) * len(self.urls)
+        for target in self.targets:
+            degrees[target] += 1
+        return degrees
+
+    def click_depths(self, start_url):
+        """BFS link distance from start_url for every node (-1 when unreachable)"""
+        offsets, targets = self.csr()
+        depths = array('l', [-1]) * len(self.urls)
+        start = self.node(start_url) if node_key(start_url) in self.ids else None
+        if start is None:
+            return depths
+        depths[start] = 0
+        queue = deque([start])
+        while queue:
+            node_id = queue.popleft()
+            next_depth = depths[node_id] + 1
+            for target in targets[offsets[node_id]:offsets[node_id + 1]]:
+                if depths[target] < 0:
+                    depths[target] = next_depth
+                    queue.append(target)
+        return depths
+
+    def pagerank(self, damping=None, iterations=None, tolerance=1e-6):
+        """PageRank per node, scaled so the average page scores 1.0
+
+        Pages without outgoing links (including uncrawled link targets)
+        spread their rank evenly over all pages.
+        """
+        damping = SITE_ANALYSIS_SETTINGS['pagerank_damping'] if damping is None else damping
+        iterations = SITE_ANALYSIS_SETTINGS['pagerank_iterations'] if iterations is None else iterations
+        count = len(self.urls)
+        if not count:
+            return []
+        offsets, targets = self.csr()
+        if NUMPY_AVAILABLE:
+            return self._pagerank_numpy(offsets, targets, count, damping, iterations, tolerance)
+
+        out_degree = [offsets[node_id + 1] - offsets[node_id] for node_id in range(count)]
+        rank = [1.0 / count] * count
+        for _ in range(iterations):
+            dangling = sum(rank[node_id] for node_id in range(count) if not out_degree[node_id])
+            base = (1 - damping) / count + damping * dangling / count
+            new_rank = [base] * count
+            for node_id in range(count):
+                if out_degree[node_id]:
+                    share = damping * rank[node_id] / out_degree[node_id]
+                    for target in targets[offsets[node_id]:offsets[node_id + 1]]:
+                        new_rank[target] += share
+            delta = sum(abs(new - old) for new, old in zip(new_rank, rank))
+            rank = new_rank
+            if delta < tolerance:
+                break
+        return [value * count for value in rank]
+
+    def _pagerank_numpy(self, offsets, targets, count, damping, iterations, tolerance):
+        offsets = np.frombuffer(offsets, dtype=np.int64 if offsets.itemsize == 8 else np.int32)
+        targets = np.frombuffer(targets, dtype=np.int64 if targets.itemsize == 8 else np.int32)
+        out_degree = np.diff(offsets)
+        sources = np.repeat(np.arange(count), out_degree)
+        dangling = out_degree == 0
+        safe_degree = np.where(dangling, 1, out_degree)
+        rank = np.full(count, 1.0 / count)
+        for _ in range(iterations):
+            base = (1 - damping) / count + damping * rank[dangling].sum() / count
+            new_rank = base + damping * np.bincount(targets, weights=(rank / safe_degree)[sources], minlength=count)
+            delta = np.abs(new_rank - rank).sum()
+            rank = new_rank
+            if delta < tolerance:
+                break
+        return (rank * count).tolist()
+
+    def summary(self, home_url, sitemap_urls, limit=None):
+        """Per-page link metrics and orphans for the site report
+
+        Returns (summary, metrics) where metrics maps each crawled or
+        sitemap URL to {'in_links', 'depth', 'pagerank'}.
+        """
+        limit = SITE_ANALYSIS_SETTINGS['worst_pages'] if limit is None else limit
+        # Register sitemap pages no link pointed at before sizing the arrays,
+        # and key them by their sitemap spelling
+        sitemap_ids = [self.node(url, canonical=True) for url in sitemap_urls]
+        home = self.ids.get(node_key(home_url))
+        in_degrees = self.in_degrees()
+        depths = self.click_depths(home_url)
+        ranks = self.pagerank()
+        pages = sorted(set(sitemap_ids) | self.crawled)
+
+        metrics = {
+            self.urls[node_id]: {
+                'in_links': in_degrees[node_id],
+                'depth': depths[node_id] if depths[node_id] >= 0 else None,
+                'pagerank': round(ranks[node_id], 3)
+            }
+            for node_id in pages
+        }
+        orphans = sorted((node_id for node_id in set(sitemap_ids) if depths[node_id] < 0),
+                         key=lambda node_id: self.urls[node_id])
+        depth_histogram = {}
+        for node_id in pages:
+            label = str(depths[node_id]) if depths[node_id] >= 0 else 'unreachable'
+            depth_histogram[label] = depth_histogram.get(label, 0) + 1
+        # Rounded so equal ranks summed in a different order tie, and ties sort by URL
+        by_rank = sorted(pages, key=lambda node_id: (-round(ranks[node_id], 9), self.urls[node_id]))
+        summary = {
+            'home_url': self.urls[home] if home is not None else home_url,
+            'home_crawled': home in self.crawled,
+            'pages': len(pages),
+            'nodes': len(self.urls),
+            'internal_links': len(self.targets),
+            'max_depth': max((depth for depth in depths if depth >= 0), default=None),
+            'depth_histogram': depth_histogram,
+            'no_inbound_links': sum(1 for node_id in sitemap_ids if not in_degrees[node_id] and node_id != home),
+            'orphan_count': len(orphans),
+            'orphans': [self.urls[node_id] for node_id in orphans[:limit]],
+            'most_linked_pages': [
+                {'url': self.urls[node_id], **metrics[self.urls[node_id]]} for node_id in by_rank[:limit]
+            ],
+            'least_linked_pages': [
+                {'url': self.urls[node_id], **metrics[self.urls[node_id]]}
+                for node_id in sorted(pages, key=lambda node_id: (round(ranks[node_id], 9), self.urls[node_id]))[:limit]
+            ]
+        }
+        return summary, metrics
@@ -0,0 +1,100 @@
+"""
+Negative cache for blocked or failing origins
+Records 403/429/503/timeout outcomes per origin and applies exponential
+backoff, so requests to an origin we already know is unreachable fail fast
+with the cached reason instead of tying up a worker until the timeout.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from config import FETCH_SETTINGS
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or HTTP-date) to seconds, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0, int((retry_at - datetime.now(timezone.utc)).total_seconds()))
+
+
+class OriginFailureCache:
+    """Per-origin failure records with exponential backoff windows"""
+
+    def __init__(self, base_delay=None, max_delay=None, max_size=None):
+        self.base_delay = FETCH_SETTINGS['backoff_base'] if base_delay is None else base_delay
+        self.max_delay = FETCH_SETTINGS['backoff_max'] if max_delay is None else max_delay
+        self.max_size = FETCH_SETTINGS['backoff_cache_size'] if max_size is None else max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """Call callback(origin, status_code, delay) after every recorded failure"""
+        self.listeners.append(callback)
+
+    def check(self, origin):
+        """Return (reason, seconds_left) if origin is backing off, else None"""
+        with self.lock:
+            entry = self.entries.get(origin)
+            if not entry:
+                return None
+            remaining = entry['until'] - time.monotonic()
+            if remaining <= 0:
+                return None
+            return entry['reason'], remaining
+
+    def record_failure(self, origin, reason, retry_after=None, status_code=None):
+        """Record a failure and extend the origin's backoff window
+
+        The window doubles with each consecutive failure; a Retry-After
+        header from the origin takes precedence when present.
+        """
+        with self.lock:
+            entry = self.entries.pop(origin, {'failures': 0})
+            entry['failures'] += 1
+            delay = min(self.base_delay * (2 ** (entry['failures'] - 1)), self.max_delay)
+            retry_seconds = parse_retry_after(retry_after)
+            if retry_seconds is not None:
+                delay = min(retry_seconds, FETCH_SETTINGS['retry_after_max'])
+            entry['reason'] = reason
+            entry['until'] = time.monotonic() + delay
+            self.entries[origin] = entry
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        for callback in self.listeners:
+            callback(origin, status_code, delay)
+        return delay
+
+    def record_success(self, origin):
+        """Forget past failures once the origin answers normally"""
+        with self.lock:
+            self.entries.pop(origin, None)
+
+    def snapshot(self):
+        """Return {origin: {failures, reason, retry_in}} for inspection"""
+        now = time.monotonic()
+        with self.lock:
+            return {
+                origin: {
+                    'failures': entry['failures'],
+                    'reason': entry['reason'],
+                    'retry_in': max(0, round(entry['until'] - now, 1))
+                }
+                for origin, entry in self.entries.items()
+            }
+
+
+origin_failures = OriginFailureCache()
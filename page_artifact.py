@@ -0,0 +1,81 @@
+"""
+Per-request page artifact
+Holds everything derived from one fetched page: raw bytes, decoded HTML, the
+parsed tree and the extracted text. Each is computed lazily and at most once,
+and the artifact is handed to every /analyze stage (structure analysis, AI
+summary, competitive comparison) so no URL is fetched and no HTML parsed
+more than once per request.
+"""
+
+from bs4 import BeautifulSoup, CData, NavigableString
+
+# Elements whose text never counts as page content
+NON_CONTENT_TAGS = {'script', 'style', 'noscript', 'template'}
+# Page chrome additionally dropped from the main text used for comparisons
+CHROME_TAGS = {'nav', 'footer', 'header', 'aside'}
+
+
+def _clean_whitespace(text):
+    """Collapse text into single-spaced phrases, one per line or double-space break"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+class PageArtifact:
+    """One fetched page and everything derived from it, computed on demand"""
+
+    def __init__(self, url, html, content=None, fetch_result=None):
+        self.url = url
+        self.html = html
+        self.content = content if content is not None else (html or '').encode('utf-8')
+        self.fetch_result = fetch_result
+        self._soup = None
+        self._texts = None
+
+    @classmethod
+    def from_fetch_result(cls, result):
+        """Build an artifact from a FetchResult, or None if the fetch failed"""
+        if not result.ok:
+            return None
+        return cls(result.url, result.text, content=result.content, fetch_result=result)
+
+    @property
+    def soup(self):
+        """The parsed tree, shared by all stages
+
+        analyze_webpage_structure strips <script>/<style> from it while
+        analyzing, so stages that need those elements must run first.
+        """
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, 'html.parser')
+        return self._soup
+
+    def _extract_texts(self):
+        # One walk over the tree yields both texts without mutating it
+        full = []
+        main = []
+        for element in self.soup.descendants:
+            if type(element) not in (NavigableString, CData):
+                continue
+            ancestors = {parent.name for parent in element.parents}
+            if ancestors & NON_CONTENT_TAGS:
+                continue
+            full.append(element)
+            if not ancestors & CHROME_TAGS:
+                main.append(element)
+        self._texts = (_clean_whitespace(''.join(full)), _clean_whitespace(''.join(main)))
+
+    @property
+    def clean_text(self):
+        """All visible text, whitespace-collapsed"""
+        if self._texts is None:
+            self._extract_texts()
+        return self._texts[0]
+
+    @property
+    def main_text(self):
+        """Visible text without navigation, header, footer and aside chrome"""
+        if self._texts is None:
+            self._extract_texts()
+        return self._texts[1]
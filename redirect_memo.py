@@ -0,0 +1,63 @@
+"""
+Redirect-chain memo for page fetches
+Bare domains typically bounce through http -> https -> www -> locale
+redirects before reaching the page. The resolved chain is remembered per
+input URL for a TTL so later fetches go straight to the final URL; the fetch
+layer falls back to full resolution whenever the shortcut fails.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from config import FETCH_SETTINGS
+
+
+def redirect_hops(response):
+    """Return [{'url', 'status_code', 'location'}] for each redirect a response followed"""
+    return [
+        {
+            'url': hop.url,
+            'status_code': hop.status_code,
+            'location': hop.headers.get('Location')
+        }
+        for hop in response.history
+    ]
+
+
+class RedirectMemo:
+    """Thread-safe LRU of input URL -> (final URL, hops) with a TTL"""
+
+    def __init__(self, ttl=None, max_size=None):
+        self.ttl = FETCH_SETTINGS['redirect_memo_ttl'] if ttl is None else ttl
+        self.max_size = FETCH_SETTINGS['redirect_memo_size'] if max_size is None else max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        """Return {'final_url', 'hops'} for a memoized URL, or None"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if not entry:
+                return None
+            if time.monotonic() - entry['at'] > self.ttl:
+                del self.entries[url]
+                return None
+            self.entries.move_to_end(url)
+            return entry
+
+    def remember(self, url, final_url, hops):
+        if not hops or final_url == url:
+            return
+        with self.lock:
+            self.entries[url] = {'final_url': final_url, 'hops': hops, 'at': time.monotonic()}
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def forget(self, url):
+        with self.lock:
+            self.entries.pop(url, None)
+
+
+redirect_memo = RedirectMemo()
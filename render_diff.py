@@ -0,0 +1,169 @@
+"""
+Raw-vs-rendered content diff
+Most AI crawlers read the HTML as served and never run JavaScript. This
+fetches a page statically (through the fetch client, so an unchanged page is
+revalidated against the HTTP cache) and once through the pooled headless
+browser, runs both through the same extraction, and reports the text,
+headings, links and JSON-LD that only exist after rendering. A page /analyze
+has already fetched is reused for its side of the diff, so a diff costs one
+browser render on top of the normal analysis.
+"""
+
+import json
+from urllib.parse import urljoin, urldefrag
+
+from fetch_client import get_fetch_client
+from page_artifact import PageArtifact
+
+# The browser is optional (selenium may not be installed)
+try:
+    from browser_analyzer import fetch_with_browser
+    BROWSER_AVAILABLE = True
+except ImportError:
+    fetch_with_browser = None
+    BROWSER_AVAILABLE = False
+
+# How many differing links/headings to list (counts are always complete)
+MAX_LISTED = 50
+# Share of the rendered text missing from the raw HTML for each dependence level
+DEPENDENCE_LEVELS = [(0.5, 'high'), (0.2, 'medium'), (0.0, 'low')]
+
+
+def _jsonld_types(data):
+    """Collect @type values from a JSON-LD document, including @graph members"""
+    types = []
+    if isinstance(data, list):
+        for item in data:
+            types.extend(_jsonld_types(item))
+    elif isinstance(data, dict):
+        value = data.get('@type')
+        if isinstance(value, list):
+            types.extend(str(item) for item in value)
+        elif value:
+            types.append(str(value))
+        for item in data.get('@graph', []) if isinstance(data.get('@graph'), list) else []:
+            types.extend(_jsonld_types(item))
+    return types
+
+
+def extract_snapshot(page):
+    """Extract the comparable parts of a page
+
+    Must run before analyze_webpage_structure, which strips <script> tags
+    (and with them JSON-LD) from the shared tree.
+    """
+    soup = page.soup
+    base_url = page.fetch_result.final_url if page.fetch_result else page.url
+    links = set()
+    for anchor in soup.find_all('a', href=True):
+        href = anchor['href'].strip()
+        if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+            continue
+        links.add(urldefrag(urljoin(base_url, href))[0])
+    jsonld = []
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            jsonld.extend(_jsonld_types(json.loads(script.string or '')))
+        except ValueError:
+            jsonld.append('(invalid JSON-LD)')
+    description = soup.find('meta', attrs={'name': 'description'})
+    canonical = soup.find('link', rel='canonical')
+    return {
+        'title': soup.title.get_text(strip=True) if soup.title else '',
+        'meta_description': description.get('content', '') if description else '',
+        'canonical': canonical.get('href', '') if canonical else '',
+        'text': page.clean_text,
+        'headings': [(heading.name, heading.get_text(' ', strip=True))
+                     for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])],
+        'links': links,
+        'jsonld_types': jsonld
+    }
+
+
+def _only_in(first, second):
+    """Items of first (a list, duplicates counted) that second does not have"""
+    remaining = {}
+    for item in second:
+        remaining[item] = remaining.get(item, 0) + 1
+    missing = []
+    for item in first:
+        if remaining.get(item):
+            remaining[item] -= 1
+        else:
+            missing.append(item)
+    return missing
+
+
+def compare_snapshots(raw, rendered):
+    """Diff two snapshots; 'rendered_only' lists what needs JavaScript to appear"""
+    raw_words = len(raw['text'].split())
+    rendered_words = len(rendered['text'].split())
+    missing_share = max(0.0, 1 - raw_words / rendered_words) if rendered_words else 0.0
+    dependence = next(label for floor, label in DEPENDENCE_LEVELS if missing_share >= floor)
+    headings_rendered_only = _only_in(rendered['headings'], raw['headings'])
+    links_rendered_only = sorted(rendered['links'] - raw['links'])
+    links_raw_only = sorted(raw['links'] - rendered['links'])
+    jsonld_rendered_only = _only_in(rendered['jsonld_types'], raw['jsonld_types'])
+    return {
+        'javascript_dependence': dependence,
+        'text': {
+            'raw_chars': len(raw['text']),
+            'rendered_chars': len(rendered['text']),
+            'raw_words': raw_words,
+            'rendered_words': rendered_words,
+            'percent_rendered_only': round(100 * missing_share, 1)
+        },
+        'headings': {
+            'raw': len(raw['headings']),
+            'rendered': len(rendered['headings']),
+            'rendered_only_count': len(headings_rendered_only),
+            'rendered_only': [{'level': level, 'text': text} for level, text in headings_rendered_only[:MAX_LISTED]]
+        },
+        'links': {
+            'raw': len(raw['links']),
+            'rendered': len(rendered['links']),
+            'rendered_only_count': len(links_rendered_only),
+            'rendered_only': links_rendered_only[:MAX_LISTED],
+            'raw_only_count': len(links_raw_only),
+            'raw_only': links_raw_only[:MAX_LISTED]
+        },
+        'jsonld': {
+            'raw_types': raw['jsonld_types'],
+            'rendered_types': rendered['jsonld_types'],
+            'rendered_only': jsonld_rendered_only
+        },
+        'changed_after_render': [
+            field for field in ('title', 'meta_description', 'canonical') if raw[field] != rendered[field]
+        ]
+    }
+
+
+def render_diff(url, page=None):
+    """Compare url's raw HTML with its browser-rendered DOM
+
+    page is an optional PageArtifact already fetched for url; a statically
+    fetched page is used as the raw side, a rendered one as the rendered
+    side. Returns the comparison dict, or {'error': ...} if either side
+    could not be fetched.
+    """
+    if not BROWSER_AVAILABLE:
+        return {'error': 'Rendering unavailable: selenium is not installed'}
+
+    raw_page = rendered_page = None
+    if page is not None and page.fetch_result is not None:
+        if page.fetch_result.fetch_tier == 'rendered':
+            rendered_page = page
+        else:
+            raw_page = page
+    if raw_page is None:
+        raw_page = PageArtifact.from_fetch_result(get_fetch_client().fetch_page(url))
+        if raw_page is None:
+            return {'error': 'Static fetch failed'}
+    raw = extract_snapshot(raw_page)
+    if rendered_page is None:
+        html_content = fetch_with_browser(url)
+        if not html_content:
+            return {'error': 'Browser render failed'}
+        rendered_page = PageArtifact(url, html_content)
+    rendered = extract_snapshot(rendered_page)
+    return compare_snapshots(raw, rendered)
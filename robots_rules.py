@@ -0,0 +1,158 @@
+"""
+Compiled robots.txt rules for AI crawler user-agents
+Parses robots.txt once (RFC 9309 groups, Allow/Disallow with * and $
+wildcards, longest match wins, ties go to Allow) and compiles each agent's
+rules into a matcher: plain prefixes are checked with str.startswith and only
+wildcard rules become regular expressions. Matchers are built lazily per agent
+and reused, so checking thousands of crawl URLs costs a few string
+comparisons each.
+"""
+
+import re
+import threading
+from urllib.parse import urlparse
+
+# Crawler tokens reported in the analysis: (robots.txt token, operator, purpose)
+AI_AGENTS = [
+    ('GPTBot', 'OpenAI', 'training'),
+    ('OAI-SearchBot', 'OpenAI', 'search'),
+    ('ChatGPT-User', 'OpenAI', 'user requests'),
+    ('ClaudeBot', 'Anthropic', 'training'),
+    ('Claude-SearchBot', 'Anthropic', 'search'),
+    ('Claude-User', 'Anthropic', 'user requests'),
+    ('PerplexityBot', 'Perplexity', 'search'),
+    ('Perplexity-User', 'Perplexity', 'user requests'),
+    ('Google-Extended', 'Google', 'Gemini training'),
+    ('Applebot-Extended', 'Apple', 'training'),
+    ('CCBot', 'Common Crawl', 'training datasets'),
+    ('Meta-ExternalAgent', 'Meta', 'training'),
+    ('Amazonbot', 'Amazon', 'search'),
+    ('Bytespider', 'ByteDance', 'training'),
+    ('cohere-ai', 'Cohere', 'training'),
+]
+
+# Largest robots.txt crawlers are required to honor (RFC 9309 section 2.5)
+MAX_ROBOTS_BYTES = 500 * 1024
+
+
+def _compile_rule(pattern):
+    """Return a predicate path -> bool for one Allow/Disallow pattern"""
+    if '*' not in pattern and not pattern.endswith('$'):
+        return lambda path: path.startswith(pattern)
+    anchored = pattern.endswith('$')
+    body = pattern[:-1] if anchored else pattern
+    regex = '.*'.join(re.escape(part) for part in body.split('*'))
+    compiled = re.compile(regex + ('$' if anchored else ''))
+    return lambda path: compiled.match(path) is not None
+
+
+class AgentRules:
+    """Compiled Allow/Disallow rules of the group that applies to one agent"""
+
+    def __init__(self, group, rules):
+        self.group = group
+        # Longest pattern first; Allow before Disallow on equal length
+        ordered = sorted(rules, key=lambda rule: (-len(rule[1]), not rule[0]))
+        self.rules = [(allow, pattern, _compile_rule(pattern)) for allow, pattern in ordered]
+
+    def allowed(self, url):
+        """True if the agent may fetch url (a full URL or a path)"""
+        parsed = urlparse(url)
+        path = (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else '')
+        if path == '/robots.txt':
+            return True
+        for allow, _, matches in self.rules:
+            if matches(path):
+                return allow
+        return True
+
+    def access(self):
+        """'allowed', 'blocked' (whole site) or 'partial'"""
+        if all(allow for allow, _, _ in self.rules):
+            return 'allowed'
+        if not self.allowed('/') and not any(allow for allow, _, _ in self.rules):
+            return 'blocked'
+        return 'partial'
+
+
+class RobotsRules:
+    """Parsed robots.txt with per-agent compiled matchers"""
+
+    def __init__(self, text):
+        self.groups = {}  # lower-cased user-agent token -> [(allow, pattern)]
+        self.sitemaps = []
+        self._matchers = {}
+        self._lock = threading.Lock()
+        self._parse((text or '')[:MAX_ROBOTS_BYTES])
+
+    def _parse(self, text):
+        agents = []
+        in_rules = False
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            name, _, value = line.partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            if name == 'user-agent':
+                if in_rules:
+                    agents = []  # A user-agent after rules starts a new group
+                    in_rules = False
+                agents.append(value.lower())
+                self.groups.setdefault(value.lower(), [])
+            elif name in ('allow', 'disallow'):
+                in_rules = True
+                # An empty Disallow allows everything and adds no rule
+                if value:
+                    for agent in agents:
+                        self.groups[agent].append((name == 'allow', value))
+            elif name == 'sitemap':
+                if value:
+                    self.sitemaps.append(value)
+            elif name:
+                in_rules = True  # crawl-delay and other group members
+
+    def _group_for(self, agent):
+        token = agent.lower()
+        if token in self.groups:
+            return token
+        return '*' if '*' in self.groups else None
+
+    def for_agent(self, agent):
+        """Return the compiled AgentRules for agent (cached)"""
+        token = agent.lower()
+        matcher = self._matchers.get(token)
+        if matcher is None:
+            group = self._group_for(agent)
+            matcher = AgentRules(group, self.groups.get(group, []))
+            with self._lock:
+                self._matchers[token] = matcher
+        return matcher
+
+    def allowed(self, agent, url):
+        return self.for_agent(agent).allowed(url)
+
+    def summary(self, url=None, agents=None):
+        """Per-agent access summary for the analysis
+
+        Returns {token: {'operator', 'purpose', 'access', 'group', 'page_allowed'}}
+        where group is the user-agent line that applies ('*' or the token
+        itself; None when robots.txt has no applicable group).
+        """
+        summary = {}
+        for token, operator, purpose in (agents or AI_AGENTS):
+            rules = self.for_agent(token)
+            summary[token] = {
+                'operator': operator,
+                'purpose': purpose,
+                'access': rules.access(),
+                'group': rules.group,
+                'page_allowed': rules.allowed(url) if url else None
+            }
+        return summary
+
+
+def blocked_agents(access_summary, page_only=False):
+    """Agent tokens the summary reports as blocked (for the page, or site-wide)"""
+    if page_only:
+        return [token for token, info in access_summary.items() if info['page_allowed'] is False]
+    return [token for token, info in access_summary.items() if info['access'] == 'blocked']
@@ -0,0 +1,517 @@
+"""
+Sitemap-driven whole-site analysis
+Streams a site's sitemaps (following sitemap indexes and the Sitemap: lines
+in robots.txt), builds a same-site URL frontier and analyzes every page through
+a dedicated OriginScheduler, so a site is crawled with bounded concurrency and
+a configurable request rate. Pages skipped because their origin is backing off
+are requeued once the backoff window ends. Per-page scores are folded into a
+SiteReport as they complete; the report keeps running totals rather than the
+full page analyses, so memory stays small for sites with thousands of pages.
+Internal links go into a LinkGraph for click depth, PageRank and orphan pages.
+Each crawl is a job in the crawl frontier, so an interrupted crawl resumes
+where its last checkpoint left off. Web requests start jobs in the background
+with submit_site_analysis and poll the frontier for progress and the report.
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from config import SITE_ANALYSIS_SETTINGS
+from crawl_frontier import DONE, FAILED, IN_FLIGHT, get_frontier
+from crawl_scheduler import OriginScheduler
+from fetch_client import OriginBackoffError, get_origin
+from link_graph import LinkGraph, internal_links, node_key
+from page_artifact import PageArtifact
+from site_files import probe_site_files
+from sitemap_parser import default_sitemaps, iter_sitemap_urls
+from robots_rules import blocked_agents
+
+SCORE_BANDS = [(80, 'excellent'), (60, 'good'), (40, 'fair'), (0, 'poor')]
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _bare_host(hostname):
+    return hostname[4:] if hostname.startswith('www.') else hostname
+
+
+def _same_site(url, hostname):
+    """True if url is on hostname, ignoring a leading www."""
+    return _bare_host((urlparse(url).hostname or '').lower()) == _bare_host(hostname)
+
+
+def clamp_max_pages(value):
+    """Validate a requested page limit and cap it at SITE_MAX_PAGES
+
+    None or an empty value means the configured maximum. Raises ValueError
+    for anything that is not a positive whole number.
+    """
+    limit = SITE_ANALYSIS_SETTINGS['max_pages']
+    if value is None or value == '':
+        return limit
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError('max_pages must be a whole number')
+    try:
+        requested = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('max_pages must be a whole number')
+    if requested < 1:
+        raise ValueError('max_pages must be at least 1')
+    return min(requested, limit)
+
+
+def build_frontier(url, max_pages=None):
+    """Return (pages, sitemap_errors, robots_skipped) for url's site
+
+    pages maps each page URL to its sitemap <lastmod> (or None). URLs are
+    deduplicated, capped at max_pages and, with respect_robots, limited to
+    those robots.txt allows for the configured robots_agent.
+    """
+    max_pages = clamp_max_pages(max_pages)
+    hostname = (urlparse(url).hostname or '').lower()
+    sitemaps = default_sitemaps(url, probe_site_files(url).content('robots_txt'))
+    pages = {}  # dict keeps insertion order and dedupes
+    errors = []
+
+    rules = probe_site_files(url).robots_rules().for_agent(SITE_ANALYSIS_SETTINGS['robots_agent'])
+    respect_robots = SITE_ANALYSIS_SETTINGS['respect_robots']
+    skipped = 0
+
+    entries = iter_sitemap_urls(sitemaps, errors=errors)
+    for entry in entries:
+        if respect_robots and not rules.allowed(entry['loc']):
+            skipped += 1
+            continue
+        if _same_site(entry['loc'], hostname):
+            pages.setdefault(entry['loc'], entry.get('lastmod'))
+            if len(pages) >= max_pages:
+                break
+    entries.close()
+
+    if not pages:
+        pages = {url: None}
+    return pages, errors, skipped
+
+
+class SiteReport:
+    """Aggregate of per-page scores for one site
+
+    Pages are keyed by URL; adding a URL that is already present replaces
+    its contribution, so the totals can be maintained incrementally.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.pages = {}
+        self.score_histogram = [0] * 101
+        self.score_total = 0
+        self.category_totals = {}
+        self.issue_counts = {}
+        self.failures = {}
+
+    def _apply(self, page, sign):
+        score = page['score']
+        self.score_histogram[score] += sign
+        self.score_total += sign * score
+        for name, (earned, possible) in page['categories'].items():
+            totals = self.category_totals.setdefault(name, [0, 0])
+            totals[0] += sign * earned
+            totals[1] += sign * possible
+        for issue in page['issues']:
+            self.issue_counts[issue] = self.issue_counts.get(issue, 0) + sign
+
+    def remove_page(self, url):
+        page = self.pages.pop(url, None)
+        if page:
+            self._apply(page, -1)
+        self.failures.pop(url, None)
+
+    def add_page(self, url, analysis, score, breakdown):
+        """Fold one analyzed page into the totals; returns its compact record"""
+        page = {
+            'url': url,
+            'title': analysis.get('title'),
+            'score': score,
+            'categories': {cat['name']: (cat['earned'], cat['possible']) for cat in breakdown['categories']},
+            'issues': page_issues(analysis)
+        }
+        self.add_record(page)
+        return page
+
+    def add_record(self, page):
+        """Fold in a compact page record, e.g. one reloaded from a crawl checkpoint"""
+        self.remove_page(page['url'])
+        self.pages[page['url']] = page
+        self._apply(page, 1)
+
+    def state(self):
+        """Aggregate totals, saved with a finished job for incremental re-runs"""
+        return {
+            'score_histogram': self.score_histogram,
+            'score_total': self.score_total,
+            'category_totals': self.category_totals,
+            'issue_counts': self.issue_counts
+        }
+
+    def restore(self, state, records):
+        """Start from saved totals and the page records they were computed from
+
+        Unlike add_record this does not re-apply each page's scores; the
+        records are still held, so it takes time linear in their number.
+        """
+        self.score_histogram = list(state['score_histogram'])
+        self.score_total = state['score_total']
+        self.category_totals = {name: list(totals) for name, totals in state['category_totals'].items()}
+        self.issue_counts = dict(state['issue_counts'])
+        self.pages = {page['url']: page for page in records}
+
+    def add_failure(self, url, error):
+        self.remove_page(url)
+        self.failures[url] = error
+
+    def _nth_score(self, rank):
+        seen = 0
+        for score, count in enumerate(self.score_histogram):
+            seen += count
+            if seen > rank:
+                return score
+        return None
+
+    def _median(self):
+        count = len(self.pages)
+        if count % 2:
+            return self._nth_score(count // 2)
+        return (self._nth_score(count // 2 - 1) + self._nth_score(count // 2)) / 2
+
+    def summary(self, worst=None):
+        """Return the site report as a JSON-serializable dict"""
+        worst = SITE_ANALYSIS_SETTINGS['worst_pages'] if worst is None else worst
+        count = len(self.pages)
+        bands = {label: 0 for _, label in SCORE_BANDS}
+        for score, hits in enumerate(self.score_histogram):
+            if hits:
+                bands[next(label for floor, label in SCORE_BANDS if score >= floor)] += hits
+        scores = [score for score, hits in enumerate(self.score_histogram) if hits]
+        lowest = heapq.nsmallest(worst, self.pages.values(), key=lambda page: page['score'])
+        link_fields = ('in_links', 'depth', 'pagerank')
+        return {
+            'site': self.site,
+            'pages_analyzed': count,
+            'pages_failed': len(self.failures),
+            'average_score': round(self.score_total / count, 1) if count else None,
+            'median_score': self._median() if count else None,
+            'min_score': scores[0] if scores else None,
+            'max_score': scores[-1] if scores else None,
+            'score_bands': bands,
+            'categories': [
+                {
+                    'name': name,
+                    'average_earned': round(earned / count, 2) if count else 0,
+                    'possible': round(possible / count, 2) if count else 0,
+                    'percent': round(100 * earned / possible, 1) if possible else None
+                }
+                for name, (earned, possible) in self.category_totals.items()
+            ],
+            'issues': [
+                {'issue': issue, 'pages': pages, 'percent': round(100 * pages / count, 1) if count else 0}
+                for issue, pages in sorted(self.issue_counts.items(), key=lambda item: -item[1])
+                if pages
+            ],
+            'lowest_scoring_pages': [
+                {'url': page['url'], 'title': page['title'], 'score': page['score'],
+                 **{field: page[field] for field in link_fields if field in page}}
+                for page in lowest
+            ],
+            'failures': [{'url': url, 'error': error} for url, error in list(self.failures.items())[:worst]]
+        }
+
+
+def page_issues(analysis):
+    """Short labels for the site-wide problems one page contributes to"""
+    issues = []
+    if not analysis.get('title') or analysis['title'] == 'No title found':
+        issues.append('Missing title')
+    if not analysis.get('meta_description'):
+        issues.append('Missing meta description')
+    h1_count = len(analysis.get('headings', {}).get('h1', []))
+    if h1_count == 0:
+        issues.append('No H1 heading')
+    elif h1_count > 1:
+        issues.append('Multiple H1 headings')
+    if analysis.get('images', {}).get('without_alt'):
+        issues.append('Images without alt text')
+    if not analysis.get('structured_data'):
+        issues.append('No structured data')
+    if not analysis.get('canonical_tag'):
+        issues.append('Missing canonical tag')
+    if not analysis.get('html_lang'):
+        issues.append('Missing HTML lang attribute')
+    if not analysis.get('faq_detected'):
+        issues.append('No FAQ/Q&A content')
+    for agent in blocked_agents(analysis.get('ai_crawler_access', {}), page_only=True):
+        issues.append(f"Blocked for {agent} by robots.txt")
+    return issues
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_site_scheduler():
+    """Scheduler for site crawls; faster per-origin pacing than interactive fetches"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = OriginScheduler(
+                    max_workers=SITE_ANALYSIS_SETTINGS['workers'],
+                    concurrency=SITE_ANALYSIS_SETTINGS['host_concurrency'],
+                    rate=SITE_ANALYSIS_SETTINGS['host_rate']
+                )
+    return _scheduler
+
+
+def analyze_page(url, site_flags, robots_rules, unchanged_digest=None):
+    """Fetch, analyze and score one page
+
+    Returns (url, analysis, score, breakdown, internal_links, digest, error)
+    where digest is the sha256 of the fetched body. A page whose body still
+    has unchanged_digest (the digest a previous job recorded) is not
+    analyzed again; analysis and error are both None. Raises
+    OriginBackoffError when the fetch was skipped because the origin is
+    backing off, so the caller can retry the page later.
+    """
+    from app import fetch_webpage, analyze_webpage_structure, calculate_ai_readiness_score
+    # A 403 usually guards just this page (a members-only post, an admin
+    # area), so it fails the page without pausing the rest of the origin
+    result = fetch_webpage(url, forbidden_backoff=False)
+    if result.retry_in is not None:
+        raise OriginBackoffError(result.error, retry_in=result.retry_in)
+    try:
+        if unchanged_digest and result.ok and result.digest == unchanged_digest:
+            return url, None, None, None, [], result.digest, None
+        page = PageArtifact.from_fetch_result(result)
+        if not page or not page.html:
+            return url, None, None, None, [], None, result.error or f"HTTP {result.status_code}"
+        links = internal_links(page.soup, result.final_url)
+        analysis = analyze_webpage_structure(page.html, url, check_site_files=False, soup=page.soup)
+        # Site files were probed once for the whole site
+        analysis.update(site_flags)
+        analysis['ai_crawler_access'] = robots_rules.summary(url)
+        score, breakdown = calculate_ai_readiness_score(analysis)
+        return url, analysis, score, breakdown, links, result.digest, None
+    except Exception as e:
+        return url, None, None, None, [], None, str(e)
+
+
+def _analyze_tracked(frontier, job_id, url, site_flags, robots_rules, unchanged_digest):
+    frontier.mark(job_id, url, IN_FLIGHT)
+    return analyze_page(url, site_flags, robots_rules, unchanged_digest)
+
+
+def analyze_site(url, max_pages=None, job_id=None, restart=False, incremental=False):
+    """Analyze every page listed in url's sitemaps and return the aggregate report
+
+    The crawl is recorded as a job in the crawl frontier. Unless restart is
+    set, an unfinished job for the same site (or the given job_id) is resumed:
+    pages it already finished are reloaded from the checkpoint instead of
+    being fetched and analyzed again.
+
+    With incremental, a new job starts from the site's last completed job:
+    pages whose sitemap lastmod is unchanged are carried forward without a
+    request. Pages without a lastmod are refetched (revalidating against the
+    HTTP cache) and carried forward when the body's digest matches the one
+    the previous job recorded. Pages with a changed lastmod, and new pages,
+    are always analyzed. The requests and analysis saved scale with the
+    unchanged pages, but the run still loads every page record of the
+    previous job to rebuild the report and link graph, so its local work
+    grows with the size of the site.
+    """
+    started = time.monotonic()
+    site = get_origin(url)
+    home_url = site + '/'
+    frontier = get_frontier()
+    if job_id is None and not restart:
+        job_id = frontier.find_incomplete_job(site)
+    job = frontier.job(job_id) if job_id else None
+    if job_id and job is None:
+        raise ValueError(f"Unknown site analysis job {job_id}")
+    if job and job['status'] in ('complete', 'failed'):
+        return job['summary']
+
+    site_probe = probe_site_files(url)
+    site_flags = site_probe.results()
+    robots_rules = site_probe.robots_rules()
+    previous = None
+    if job and job['status'] == 'running':
+        sitemap_errors = job['params'].get('sitemap_errors', [])
+        robots_skipped = job['params'].get('robots_skipped', 0)
+    else:
+        # New job, or one submitted in the background that has no frontier yet
+        params = job['params'] if job else {}
+        max_pages = params.get('max_pages', max_pages)
+        incremental = params.get('incremental', incremental)
+        pages, sitemap_errors, robots_skipped = build_frontier(url, max_pages)
+        # The link graph's click depths are measured from the home page
+        if node_key(home_url) not in {node_key(page_url) for page_url in pages} \
+                and robots_rules.allowed(SITE_ANALYSIS_SETTINGS['robots_agent'], home_url):
+            pages = {home_url: None, **pages}
+        previous = frontier.latest_complete_job(site) if incremental else None
+        params = dict(params, url=url, sitemap_errors=sitemap_errors, robots_skipped=robots_skipped,
+                      incremental_from=previous[0] if previous else None)
+        if job:
+            frontier.start_job(job_id, pages, params)
+        else:
+            job_id = frontier.create_job(site, pages, params)
+
+    report = SiteReport(site)
+    graph = LinkGraph()
+    previous_links = {}
+    unchanged_digests = {}  # page URL -> previous job's body digest, for pages without a lastmod
+    incremental_stats = None
+    if previous:
+        previous_id, previous_state = previous
+        carried = frontier.carry_forward(job_id, previous_id)
+        pending, finished = frontier.resume(job_id, load_finished=False)
+        previous_records = frontier.records(previous_id)
+        previous_links = {page_url: record.pop('links', []) for page_url, record in previous_records.items()}
+        previous_digests = {page_url: record.pop('digest', None) for page_url, record in previous_records.items()}
+        unchanged_digests = {page_url: previous_digests[page_url] for page_url in pending
+                             if page_url in previous_digests and pages.get(page_url) is None}
+        report.restore(previous_state, previous_records.values())
+        removed = [page_url for page_url in previous_records if page_url not in pages]
+        for page_url in removed:
+            report.remove_page(page_url)
+        for page_url in carried:
+            graph.add_page(page_url, previous_links[page_url])
+        job_urls = list(carried) + pending
+        incremental_stats = {
+            'previous_job_id': previous_id,
+            'unchanged_by_lastmod': len(carried),
+            'unchanged_by_content': 0,
+            'reanalyzed': 0,
+            'removed': len(removed)
+        }
+        print(f"Incremental site analysis {job_id}: {len(carried)} pages unchanged since "
+              f"{previous_id}, {len(pending)} to check")
+    else:
+        pending, finished = frontier.resume(job_id)
+        job_urls = [page_url for page_url, _, _ in finished] + pending
+        for page_url, state, record in finished:
+            if state == DONE:
+                graph.add_page(page_url, record.pop('links', []))
+                report.add_record(record)
+            else:
+                report.add_failure(page_url, record)
+        if finished:
+            print(f"Resuming site analysis {job_id}: {len(finished)} pages already done, {len(pending)} to go")
+        else:
+            print(f"Analyzing {len(pending)} pages from {site} (job {job_id})")
+
+    scheduler = get_site_scheduler()
+    futures = {}  # future -> page URL
+    deferrals = {}
+
+    def submit(page_url):
+        future = scheduler.submit(page_url, _analyze_tracked, frontier, job_id, page_url, site_flags,
+                                  robots_rules, unchanged_digests.get(page_url))
+        futures[future] = page_url
+
+    for page_url in pending:
+        submit(page_url)
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            page_url = futures.pop(future)
+            try:
+                page_url, analysis, score, breakdown, links, digest, error = future.result()
+            except OriginBackoffError as e:
+                deferrals[page_url] = deferrals.get(page_url, 0) + 1
+                if deferrals[page_url] <= SITE_ANALYSIS_SETTINGS['backoff_retries']:
+                    # Hold the origin's queue until the backoff ends, then retry
+                    scheduler.pause(page_url, e.retry_in or 0)
+                    submit(page_url)
+                    continue
+                analysis, error = None, str(e)
+            if error:
+                report.add_failure(page_url, error)
+                frontier.mark(job_id, page_url, FAILED, error)
+            elif analysis is None:
+                # Same body as the previous job saw: keep its record
+                links = previous_links.get(page_url, [])
+                graph.add_page(page_url, links)
+                frontier.mark(job_id, page_url, DONE, dict(report.pages[page_url], links=links, digest=digest))
+                incremental_stats['unchanged_by_content'] += 1
+            else:
+                graph.add_page(page_url, links)
+                record = report.add_page(page_url, analysis, score, breakdown)
+                frontier.mark(job_id, page_url, DONE, dict(record, links=links, digest=digest))
+                if incremental_stats:
+                    incremental_stats['reanalyzed'] += 1
+
+    link_summary, link_metrics = graph.summary(home_url, job_urls)
+    for page_url, metrics in link_metrics.items():
+        if page_url in report.pages:
+            report.pages[page_url].update(metrics)
+
+    summary = report.summary()
+    summary.update(site_flags)
+    summary['sitemap'] = site_probe.content('sitemap_xml')
+    summary['ai_crawler_access'] = robots_rules.summary()
+    summary['robots_skipped'] = robots_skipped
+    summary['sitemap_errors'] = sitemap_errors
+    summary['link_graph'] = link_summary
+    summary['job_id'] = job_id
+    summary['resumed_pages'] = len(finished)
+    summary['incremental'] = incremental_stats
+    summary['elapsed_seconds'] = round(time.monotonic() - started, 1)
+    frontier.finish(job_id, summary, report.state())
+    return summary
+
+
+_job_executor = ThreadPoolExecutor(
+    max_workers=SITE_ANALYSIS_SETTINGS['max_jobs'],
+    thread_name_prefix='site-analysis'
+)
+_active_jobs = set()
+_active_jobs_lock = threading.Lock()
+
+
+def _run_job(url, job_id):
+    try:
+        analyze_site(url, job_id=job_id)
+    except Exception as e:
+        print(f"Site analysis {job_id} failed: {e}")
+        get_frontier().fail(job_id, str(e))
+    finally:
+        with _active_jobs_lock:
+            _active_jobs.discard(job_id)
+
+
+def submit_site_analysis(url, max_pages=None, restart=False, incremental=False, owner=None):
+    """Start a site analysis in the background and return its job id
+
+    An unfinished job for the same site and owner is resumed unless restart
+    is set. Progress and the final report are read with
+    get_frontier().job(job_id); the job's params record the owner.
+    """
+    site = get_origin(url)
+    frontier = get_frontier()
+    job_id = None if restart else frontier.find_incomplete_job(site)
+    if job_id and frontier.job(job_id)['params'].get('owner') != owner:
+        job_id = None
+    if job_id is None:
+        job_id = frontier.create_job(site, params={
+            'url': url, 'max_pages': max_pages, 'incremental': incremental, 'owner': owner
+        })
+    with _active_jobs_lock:
+        if job_id in _active_jobs:
+            return job_id
+        _active_jobs.add(job_id)
+    _job_executor.submit(_run_job, url, job_id)
+    return job_id
@@ -0,0 +1,200 @@
+"""
+Site-file probing for AI Discoverability Analyzer
+Fetches robots.txt, sitemap.xml and llms.txt for an origin concurrently so
+the total probe latency is bounded by the slowest single file. sitemap.xml is
+streamed through sitemap_parser and summarized rather than held in memory.
+Results are cached per origin so repeat pages from the same site skip all
+three requests; a file whose probe hit a network error is re-probed on its
+own the next time the origin is looked up.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from config import FETCH_SETTINGS, SITEMAP_SETTINGS
+from fetch_client import get_fetch_client, get_origin
+from sitemap_parser import summarize_sitemaps
+from robots_rules import RobotsRules
+
+SITE_FILES = {
+    'robots_txt': '/robots.txt',
+    'sitemap_xml': '/sitemap.xml',
+    'llms_txt': '/llms.txt'
+}
+
+# Keep at most this much of robots.txt / llms.txt in the cache
+MAX_CACHED_TEXT = 512 * 1024
+
+_executor = ThreadPoolExecutor(
+    max_workers=FETCH_SETTINGS['probe_workers'],
+    thread_name_prefix='site-file-probe'
+)
+
+
+def _parse_robots(response):
+    if response.status_code == 200 and 'User-agent' in response.text:
+        return True, response.text[:MAX_CACHED_TEXT]
+    return False, None
+
+
+def _probe_sitemap(origin):
+    """Stream /sitemap.xml (and the first few index children) into a summary
+
+    Runs on the /analyze request path, so the scan is bounded by the probe
+    file and time budget; site_analyzer walks complete indexes.
+    """
+    summary = summarize_sitemaps([urljoin(origin, SITE_FILES['sitemap_xml'])], origin,
+                                 max_files=SITEMAP_SETTINGS['probe_max_files'],
+                                 max_seconds=SITEMAP_SETTINGS['probe_seconds'])
+    if summary['sitemap_files'] or summary['index_files']:
+        return True, summary
+    for error in summary['errors']:
+        if error['kind'] == 'network':
+            # Worth retrying, unlike a missing file
+            raise Exception(error['error'])
+    if any(error['kind'] == 'invalid' for error in summary['errors']):
+        # Served but unreadable, e.g. an HTML soft-404 page
+        summary['invalid'] = True
+        return False, summary
+    return False, None
+
+
+def _parse_llms(response):
+    if response.status_code == 200:
+        return True, response.text[:MAX_CACHED_TEXT]
+    return False, None
+
+
+PARSERS = {
+    'robots_txt': _parse_robots,
+    'llms_txt': _parse_llms
+}
+
+
+def _probe(origin, name):
+    """Fetch one site file and return {'present', 'content', 'error'}"""
+    try:
+        if name == 'sitemap_xml':
+            present, content = _probe_sitemap(origin)
+        else:
+            response = get_fetch_client().probe(urljoin(origin, SITE_FILES[name]))
+            present, content = PARSERS[name](response)
+        return {'present': present, 'content': content, 'error': None}
+    except Exception as e:
+        # Don't fail analysis if these checks error
+        return {'present': False, 'content': None, 'error': str(e)}
+
+
+class SiteFileProbe:
+    """Handle for the (possibly in-flight) site-file probes of one origin"""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.created_at = time.monotonic()
+        self.futures = {
+            name: _executor.submit(_probe, origin, name)
+            for name in SITE_FILES
+        }
+        self._robots_rules = None
+        self.lock = threading.Lock()
+
+    def _outcome(self, name):
+        try:
+            return self.futures[name].result()
+        except Exception as e:
+            return {'present': False, 'content': None, 'error': str(e)}
+
+    def result(self, name):
+        """Block until the named probe finishes and return its presence flag"""
+        return self._outcome(name)['present']
+
+    def content(self, name):
+        """Block until the named probe finishes and return its parsed content"""
+        return self._outcome(name)['content']
+
+    def results(self):
+        """Join all probes and return {name: flag}"""
+        return {name: self.result(name) for name in SITE_FILES}
+
+    def robots_rules(self):
+        """Compiled robots.txt rules for the origin, built once per cached probe"""
+        if self._robots_rules is None:
+            self._robots_rules = RobotsRules(self.content('robots_txt'))
+        return self._robots_rules
+
+    def analysis_fields(self, url=None):
+        """Join all probes and return the fields they add to a page analysis"""
+        fields = self.results()
+        fields['sitemap'] = self.content('sitemap_xml')
+        fields['ai_crawler_access'] = self.robots_rules().summary(url)
+        return fields
+
+    def done(self):
+        return all(future.done() for future in self.futures.values())
+
+    def failed(self):
+        """True once finished if any probe errored (timeout, connection reset...)"""
+        return self.done() and any(self._outcome(name)['error'] for name in SITE_FILES)
+
+    def retry_failed(self):
+        """Start the finished probes that errored again, leaving the rest cached"""
+        with self.lock:
+            for name, future in self.futures.items():
+                if future.done() and self._outcome(name)['error']:
+                    self.futures[name] = _executor.submit(_probe, self.origin, name)
+                    if name == 'robots_txt':
+                        self._robots_rules = None
+
+
+class SiteFileCache:
+    """Thread-safe per-origin LRU cache of SiteFileProbe handles with a TTL
+
+    In-flight probes are cached too, so concurrent analyses of the same
+    origin share one set of requests.
+    """
+
+    def __init__(self, ttl=None, max_size=None):
+        self.ttl = FETCH_SETTINGS['site_file_cache_ttl'] if ttl is None else ttl
+        self.max_size = FETCH_SETTINGS['site_file_cache_size'] if max_size is None else max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _is_fresh(self, probe):
+        return time.monotonic() - probe.created_at <= self.ttl
+
+    def get_or_probe(self, origin):
+        """Return a cached probe for origin, starting a new one on miss
+
+        Files whose cached probe errored are retried; the others are reused.
+        """
+        with self.lock:
+            probe = self.entries.get(origin)
+            if probe is not None and self._is_fresh(probe):
+                self.entries.move_to_end(origin)
+                probe.retry_failed()
+                return probe
+            probe = SiteFileProbe(origin)
+            self.entries[origin] = probe
+            self.entries.move_to_end(origin)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            return probe
+
+    def invalidate(self, origin=None):
+        """Drop one origin (or everything) from the cache"""
+        with self.lock:
+            if origin is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(origin, None)
+
+
+site_file_cache = SiteFileCache()
+
+
+def probe_site_files(url):
+    """Return site-file probes for url's origin, cached and non-blocking"""
+    return site_file_cache.get_or_probe(get_origin(url))
@@ -0,0 +1,265 @@
+"""
+Streaming sitemap parser
+Reads <loc>, <lastmod>, <changefreq> and <priority> entries incrementally from
+(optionally gzipped) sitemap responses with ElementTree.iterparse, clearing
+each element once it has been yielded, so memory stays constant even for
+50MB sitemaps. Sitemap indexes are followed breadth-first up to a configurable
+depth. summarize_sitemaps() condenses a site's sitemaps into the counts,
+coverage and staleness figures reported in the analysis; callers on a
+request path give it a file and time budget.
+"""
+
+import contextlib
+import gzip
+import io
+import time
+import xml.etree.ElementTree as ET
+from datetime import date
+from functools import partial
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from config import SITEMAP_SETTINGS
+from fetch_client import get_fetch_client, get_origin
+
+CHUNK_SIZE = 64 * 1024
+ENTRY_TAGS = {'url', 'sitemap'}
+ROOT_TAGS = {'urlset', 'sitemapindex'}
+FIELD_TAGS = {'loc', 'lastmod', 'changefreq', 'priority'}
+# Lastmod age buckets reported in the staleness summary (upper bound in days)
+AGE_BUCKETS = [(30, 'under_30_days'), (90, 'under_90_days'), (365, 'under_1_year'), (None, 'over_1_year')]
+
+
+class SitemapTooLarge(Exception):
+    """Raised when a sitemap exceeds the configured uncompressed size"""
+
+
+class _IterStream(io.RawIOBase):
+    """File-like view over an iterator of byte chunks, with a byte cap"""
+
+    def __init__(self, chunks, max_bytes=None):
+        self.chunks = iter(chunks)
+        self.buffer = b''
+        self.max_bytes = max_bytes
+        self.total = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self.buffer:
+            try:
+                self.buffer = next(self.chunks)
+            except StopIteration:
+                return 0
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        self.total += size
+        if self.max_bytes and self.total > self.max_bytes:
+            raise SitemapTooLarge(f"Sitemap exceeds the {self.max_bytes} byte limit")
+        return size
+
+
+@contextlib.contextmanager
+def open_sitemap(sitemap_url):
+    """Stream a sitemap over HTTP as a binary file object of its (decompressed) XML"""
+    response = get_fetch_client().probe(sitemap_url, stream=True)
+    try:
+        response.raise_for_status()
+        # Content-Encoding: gzip is undone by the HTTP layer; .xml.gz files are not
+        stream = io.BufferedReader(_IterStream(response.iter_content(chunk_size=CHUNK_SIZE)))
+        if stream.peek(2)[:2] == b'\x1f\x8b':
+            stream = gzip.GzipFile(fileobj=stream)
+        yield io.BufferedReader(_IterStream(iter(partial(stream.read, CHUNK_SIZE), b''),
+                                            SITEMAP_SETTINGS['max_bytes']))
+    finally:
+        response.close()
+
+
+def iter_entries(stream):
+    """Yield ('url' | 'sitemap', {'loc', 'lastmod', 'changefreq', 'priority'}) from a sitemap stream
+
+    Only direct children of each entry are read, so extension elements such
+    as <image:loc> never shadow the page's own <loc>. Raises ValueError when
+    the document is not a <urlset> or <sitemapindex>.
+    """
+    context = ET.iterparse(stream, events=('start', 'end'))
+    root = None
+    entry = None
+    depth = 0
+    for event, element in context:
+        if event == 'start':
+            depth += 1
+            if root is None:
+                root = element
+                if element.tag.rsplit('}', 1)[-1] not in ROOT_TAGS:
+                    raise ValueError(f"Not a sitemap: root element is <{element.tag.rsplit('}', 1)[-1]}>")
+            elif depth == 2 and element.tag.rsplit('}', 1)[-1] in ENTRY_TAGS:
+                entry = {}
+            continue
+        tag = element.tag.rsplit('}', 1)[-1]
+        if entry is not None and depth == 3 and tag in FIELD_TAGS:
+            entry[tag] = (element.text or '').strip()
+        elif entry is not None and depth == 2:
+            if entry.get('loc'):
+                yield tag, entry
+            entry = None
+            # Drop finished entries so the tree never grows
+            root.clear()
+        depth -= 1
+
+
+def iter_sitemap_urls(sitemap_urls, max_depth=None, errors=None, stats=None, max_files=None):
+    """Yield page entries from sitemap_urls, following sitemap indexes breadth-first
+
+    Each entry is the <url> dict plus 'sitemap', the file it came from.
+    Fetch and parse failures are appended to errors (if given) as
+    {'sitemap', 'error', 'status', 'kind'} and skipped, where kind is
+    'network' (no usable response), 'http' (error status), 'invalid' (a
+    response that is not a readable sitemap) or 'limit';
+    stats (if given) counts sitemap and index files read and gets
+    'limit_reached' when files were left unread.
+    """
+    max_depth = SITEMAP_SETTINGS['max_depth'] if max_depth is None else max_depth
+    max_files = SITEMAP_SETTINGS['max_files'] if max_files is None else max_files
+    pending = [(sitemap_url, 0) for sitemap_url in sitemap_urls]
+    seen = set()
+    while pending:
+        sitemap_url, depth = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        if len(seen) > max_files:
+            if stats is not None:
+                stats['limit_reached'] = True
+            if errors is not None:
+                errors.append({'sitemap': sitemap_url, 'error': 'Sitemap file limit reached',
+                               'status': None, 'kind': 'limit'})
+            return
+        try:
+            with open_sitemap(sitemap_url) as stream:
+                is_index = False
+                for kind, entry in iter_entries(stream):
+                    if kind == 'sitemap':
+                        is_index = True
+                        if depth < max_depth:
+                            pending.append((urljoin(sitemap_url, entry['loc']), depth + 1))
+                        continue
+                    entry['sitemap'] = sitemap_url
+                    yield entry
+                if stats is not None:
+                    stats['index_files' if is_index else 'sitemap_files'] += 1
+        except Exception as e:
+            if errors is not None:
+                response = getattr(e, 'response', None)
+                if isinstance(e, requests.exceptions.HTTPError):
+                    kind = 'http'
+                elif isinstance(e, requests.exceptions.RequestException):
+                    kind = 'network'
+                else:
+                    kind = 'invalid'
+                errors.append({'sitemap': sitemap_url, 'error': str(e),
+                               'status': getattr(response, 'status_code', None), 'kind': kind})
+
+
+def parse_lastmod(value):
+    """Return the date part of a W3C datetime lastmod, or None"""
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize_sitemaps(sitemap_urls, site_url, max_urls=None, max_files=None, max_seconds=None):
+    """Stream sitemap_urls and return counts, coverage and staleness for the analysis
+
+    Scans at most max_urls page entries from at most max_files sitemap
+    files, for at most max_seconds; 'complete' is False when the scan
+    stopped early.
+    """
+    max_urls = SITEMAP_SETTINGS['summary_max_urls'] if max_urls is None else max_urls
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    hostname = (urlparse(site_url).hostname or '').lower()
+    today = date.today()
+    errors = []
+    stats = {'sitemap_files': 0, 'index_files': 0}
+    urls = 0
+    same_host = 0
+    with_lastmod = 0
+    with_priority = 0
+    newest = None
+    oldest = None
+    ages = {label: 0 for _, label in AGE_BUCKETS}
+    complete = True
+
+    entries = iter_sitemap_urls(sitemap_urls, errors=errors, stats=stats, max_files=max_files)
+    for entry in entries:
+        if urls >= max_urls or (deadline and time.monotonic() > deadline):
+            complete = False
+            break
+        urls += 1
+        if (urlparse(entry['loc']).hostname or '').lower() == hostname:
+            same_host += 1
+        if entry.get('priority'):
+            with_priority += 1
+        lastmod = parse_lastmod(entry.get('lastmod'))
+        if lastmod:
+            with_lastmod += 1
+            newest = lastmod if newest is None or lastmod > newest else newest
+            oldest = lastmod if oldest is None or lastmod < oldest else oldest
+            age = (today - lastmod).days
+            ages[next(label for limit, label in AGE_BUCKETS if limit is None or age < limit)] += 1
+    entries.close()
+    if stats.get('limit_reached'):
+        complete = False
+
+    def percent(part):
+        return round(100 * part / urls, 1) if urls else 0
+
+    return {
+        'sitemaps': list(sitemap_urls),
+        'sitemap_files': stats['sitemap_files'],
+        'index_files': stats['index_files'],
+        'urls': urls,
+        'complete': complete,
+        'coverage': {
+            'same_host_percent': percent(same_host),
+            'lastmod_percent': percent(with_lastmod),
+            'priority_percent': percent(with_priority)
+        },
+        'staleness': {
+            'newest_lastmod': newest.isoformat() if newest else None,
+            'oldest_lastmod': oldest.isoformat() if oldest else None,
+            'days_since_update': (today - newest).days if newest else None,
+            'lastmod_age': ages,
+            'stale_percent': round(100 * ages['over_1_year'] / with_lastmod, 1) if with_lastmod else None
+        },
+        'errors': errors
+    }
+
+
+def default_sitemaps(url, robots_txt=None):
+    """Sitemap URLs for url's site: robots.txt Sitemap: lines, else /sitemap.xml"""
+    origin = get_origin(url)
+    sitemaps = []
+    for line in (robots_txt or '').splitlines():
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'sitemap' and value.strip():
+            sitemaps.append(urljoin(origin, value.strip()))
+    return sitemaps or [urljoin(origin, '/sitemap.xml')]
+
+
+def describe_sitemap(summary):
+    """One-line description of a sitemap summary for prompts and reports"""
+    if not summary:
+        return 'Missing'
+    if summary.get('invalid'):
+        return f"Not a valid sitemap ({summary['errors'][0]['error']})"
+    parts = [f"{summary['urls']}{'' if summary['complete'] else '+'} URLs",
+             f"{summary['coverage']['lastmod_percent']}% with lastmod"]
+    days = summary['staleness']['days_since_update']
+    if days is not None:
+        parts.append(f"last updated {days} days ago")
+    return f"Present ({', '.join(parts)})"
@@ -0,0 +1,23 @@
+"""
+Tests for the internal link graph used by whole-site analysis
+"""
+
+from link_graph import LinkGraph
+
+
+def test_link_variants_are_reported_under_the_sitemap_url():
+    graph = LinkGraph()
+    # The first link to /about uses another scheme, www. and a trailing slash
+    graph.add_page('https://example.com/', ['http://www.example.com/about/', 'https://example.com/contact/'])
+    graph.add_page('https://example.com/about', ['https://example.com/'])
+    sitemap = ['https://example.com/', 'https://example.com/about', 'https://example.com/contact',
+               'https://example.com/lost']
+
+    summary, metrics = graph.summary('https://example.com/', sitemap)
+    assert set(metrics) == set(sitemap)
+    assert metrics['https://example.com/about']['in_links'] == 1
+    assert metrics['https://example.com/about']['depth'] == 1
+    # Linked but never crawled; still keyed by its sitemap spelling
+    assert metrics['https://example.com/contact']['depth'] == 1
+    assert summary['orphans'] == ['https://example.com/lost']
+    assert summary['nodes'] == 4
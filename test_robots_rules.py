@@ -0,0 +1,77 @@
+"""
+Tests for robots.txt parsing and rule matching
+"""
+
+from robots_rules import RobotsRules, blocked_agents
+
+
+def test_longest_match_wins():
+    rules = RobotsRules("User-agent: *\nDisallow: /shop\nAllow: /shop/public\nDisallow: /shop/public/drafts\n")
+    assert not rules.allowed('GPTBot', 'https://example.com/shop/cart')
+    assert rules.allowed('GPTBot', 'https://example.com/shop/public/item')
+    assert not rules.allowed('GPTBot', 'https://example.com/shop/public/drafts/1')
+    assert rules.allowed('GPTBot', 'https://example.com/blog')
+
+
+def test_tie_goes_to_allow():
+    rules = RobotsRules("User-agent: *\nDisallow: /page\nAllow: /page\n")
+    assert rules.allowed('GPTBot', '/page')
+    rules = RobotsRules("User-agent: *\nAllow: /page\nDisallow: /page\n")
+    assert rules.allowed('GPTBot', '/page')
+
+
+def test_wildcards():
+    rules = RobotsRules("User-agent: *\nDisallow: /*.pdf$\nDisallow: /search*q=\n")
+    assert not rules.allowed('GPTBot', '/files/report.pdf')
+    assert rules.allowed('GPTBot', '/files/report.pdf?download=1')
+    assert rules.allowed('GPTBot', '/files/report.pdfx')
+    assert not rules.allowed('GPTBot', '/search?page=2&q=term')
+    assert rules.allowed('GPTBot', '/search?page=2')
+
+
+def test_query_string_is_matched():
+    rules = RobotsRules("User-agent: *\nDisallow: /*?sessionid=\n")
+    assert not rules.allowed('GPTBot', 'https://example.com/cart?sessionid=1')
+    assert rules.allowed('GPTBot', 'https://example.com/cart')
+
+
+def test_groups_for_the_same_agent_are_merged():
+    rules = RobotsRules(
+        "User-agent: GPTBot\nDisallow: /private\n\n"
+        "User-agent: *\nDisallow: /tmp\n\n"
+        "User-agent: gptbot\nDisallow: /drafts\n"
+    )
+    assert not rules.allowed('GPTBot', '/private/1')
+    assert not rules.allowed('GPTBot', '/drafts/1')
+    # A specific group replaces the * group rather than adding to it
+    assert rules.allowed('GPTBot', '/tmp/1')
+    assert not rules.allowed('ClaudeBot', '/tmp/1')
+
+
+def test_consecutive_user_agents_share_a_group():
+    rules = RobotsRules("User-agent: GPTBot\nUser-agent: CCBot\nDisallow: /\n\nUser-agent: *\nAllow: /\n")
+    assert not rules.allowed('GPTBot', '/page')
+    assert not rules.allowed('CCBot', '/page')
+    assert rules.allowed('ClaudeBot', '/page')
+
+
+def test_robots_txt_is_always_allowed():
+    rules = RobotsRules("User-agent: *\nDisallow: /\n")
+    assert rules.allowed('GPTBot', '/robots.txt')
+
+
+def test_summary_access():
+    rules = RobotsRules(
+        "User-agent: GPTBot\nDisallow: /\n\n"
+        "User-agent: ClaudeBot\nDisallow: /private\n\n"
+        "User-agent: *\nDisallow:\n\n"
+        "Sitemap: https://example.com/sitemap.xml\n"
+    )
+    summary = rules.summary('https://example.com/private/page')
+    assert summary['GPTBot']['access'] == 'blocked'
+    assert summary['ClaudeBot']['access'] == 'partial'
+    assert summary['CCBot']['access'] == 'allowed'
+    assert summary['CCBot']['group'] == '*'
+    assert blocked_agents(summary) == ['GPTBot']
+    assert blocked_agents(summary, page_only=True) == ['GPTBot', 'ClaudeBot']
+    assert rules.sitemaps == ['https://example.com/sitemap.xml']
@@ -0,0 +1,173 @@
+"""
+Regression tests for (incremental) whole-site analysis
+
+A local HTTP server plays the site; the crawl frontier and HTTP cache live in
+a temporary directory so runs never touch the real ones.
+"""
+
+import http.server
+import socketserver
+import threading
+import time
+
+import pytest
+
+import crawl_frontier
+import http_cache
+import site_analyzer
+from fetch_client import get_origin
+from origin_backoff import origin_failures
+from config import FETCH_SETTINGS
+from crawl_frontier import CrawlFrontier
+from http_cache import HttpCache
+
+
+class Site:
+    """Pages served by the test server: path -> {'title', 'lastmod', 'version'}"""
+
+    def __init__(self):
+        self.pages = {
+            '/': {'title': 'Home', 'lastmod': None, 'version': 1},
+            '/dated': {'title': 'Dated', 'lastmod': '2024-01-01', 'version': 1},
+            '/undated': {'title': 'Undated', 'lastmod': None, 'version': 1},
+        }
+        self.full_responses = []
+        # Paths answered with 403 Forbidden, straight away; other pages
+        # are answered after delay seconds
+        self.forbidden = set()
+        self.delay = 0
+
+    def sitemap(self, base):
+        entries = ''.join(
+            f"<url><loc>{base}{path}</loc>" + (f"<lastmod>{page['lastmod']}</lastmod>" if page['lastmod'] else '')
+            + "</url>"
+            for path, page in self.pages.items()
+        )
+        return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+    def html(self, path):
+        page = self.pages[path]
+        links = ''.join(f'<a href="{other}">{other}</a>' for other in self.pages if other != path)
+        # Later versions fix the missing meta description
+        description = '<meta name="description" content="Updated">' if page['version'] > 1 else ''
+        return (f'<html lang="en"><head><title>{page["title"]} v{page["version"]}</title>{description}</head>'
+                f'<body><h1>{page["title"]}</h1>{links}<p>{"content " * 100}</p></body></html>')
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    site = Site()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            base = f"http://127.0.0.1:{self.server.server_address[1]}"
+            etag = None
+            status = 200
+            if self.path == '/robots.txt':
+                body, content_type = f"User-agent: *\nAllow: /\nSitemap: {base}/sitemap.xml\n", 'text/plain'
+            elif self.path == '/sitemap.xml':
+                body, content_type = site.sitemap(base), 'application/xml'
+            elif self.path in site.forbidden:
+                body, content_type, status = 'Forbidden', 'text/plain', 403
+            elif self.path in site.pages:
+                time.sleep(site.delay)
+                etag = f'"{self.path}-{site.pages[self.path]["version"]}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                site.full_responses.append(self.path)
+                body, content_type = site.html(self.path), 'text/html; charset=utf-8'
+            else:
+                body, content_type, status = 'Not found', 'text/plain', 404
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            if etag:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(crawl_frontier, '_frontier', CrawlFrontier(str(tmp_path / 'frontier.sqlite3')))
+    monkeypatch.setattr(http_cache, '_http_cache', HttpCache(str(tmp_path / 'http_cache'), enabled=True))
+    site.base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield site
+    server.shutdown()
+    server.server_close()
+
+
+def page_titles(report):
+    return {page['url'].rsplit('/', 1)[-1]: page['title'] for page in report['lowest_scoring_pages']}
+
+
+def test_incremental_run_carries_unchanged_pages(site):
+    full = site_analyzer.analyze_site(site.base, restart=True)
+    assert full['pages_analyzed'] == 3
+    site.full_responses.clear()
+
+    report = site_analyzer.analyze_site(site.base, restart=True, incremental=True)
+    assert report['incremental']['unchanged_by_lastmod'] == 1
+    assert report['incremental']['unchanged_by_content'] == 2
+    assert report['incremental']['reanalyzed'] == 0
+    # Undated pages were revalidated with 304s, not downloaded again
+    assert site.full_responses == []
+    assert report['average_score'] == full['average_score']
+
+
+def test_page_refreshed_in_http_cache_is_reanalyzed(site):
+    from app import fetch_webpage
+
+    site_analyzer.analyze_site(site.base, restart=True)
+    site.pages['/undated']['version'] = 2
+    # An interactive /analyze refreshes the shared HTTP cache, so the crawl's
+    # conditional request now gets a 304 for a body the last job never saw
+    assert fetch_webpage(f"{site.base}/undated").ok
+
+    report = site_analyzer.analyze_site(site.base, restart=True, incremental=True)
+    assert report['incremental']['reanalyzed'] == 1
+    assert page_titles(report)['undated'] == 'Undated v2'
+
+
+def test_page_with_changed_lastmod_is_reanalyzed_despite_304(site):
+    from app import fetch_webpage
+
+    site_analyzer.analyze_site(site.base, restart=True)
+    site.pages['/dated'].update(version=2, lastmod='2025-01-01')
+    assert fetch_webpage(f"{site.base}/dated").ok
+
+    report = site_analyzer.analyze_site(site.base, restart=True, incremental=True)
+    assert report['incremental']['unchanged_by_lastmod'] == 0
+    assert report['incremental']['reanalyzed'] == 1
+    assert page_titles(report)['dated'] == 'Dated v2'
+
+    fresh = site_analyzer.analyze_site(site.base, restart=True)
+    assert report['average_score'] == fresh['average_score']
+    assert report['issues'] == fresh['issues']
+
+
+def test_forbidden_page_fails_without_pausing_the_origin(site):
+    # Enough pages that most are still queued when the 403 comes back
+    for number in range(20):
+        site.pages[f'/more/{number}'] = {'title': f'More {number}', 'lastmod': None, 'version': 1}
+    site.forbidden.add('/dated')
+    site.delay = 0.05
+    started = time.monotonic()
+    report = site_analyzer.analyze_site(site.base, restart=True)
+    # A paused origin would hold the other pages for the backoff window
+    assert time.monotonic() - started < FETCH_SETTINGS['backoff_base']
+    assert report['pages_analyzed'] == 22
+    assert report['pages_failed'] == 1
+    assert origin_failures.check(get_origin(site.base)) is None
@@ -0,0 +1,94 @@
+"""
+Regression tests for per-origin site-file probing
+
+A local HTTP server plays the origin and counts the requests for each file.
+"""
+
+import http.server
+import socketserver
+import threading
+from collections import Counter
+
+import pytest
+
+from site_files import SiteFileCache
+from sitemap_parser import describe_sitemap
+
+
+@pytest.fixture
+def origin():
+    hits = Counter()
+    # Paths whose next requests are answered by dropping the connection
+    drops = Counter()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            hits[self.path] += 1
+            if drops[self.path]:
+                drops[self.path] -= 1
+                self.close_connection = True
+                return
+            if self.path == '/robots.txt':
+                body, content_type = 'User-agent: *\nAllow: /\n', 'text/plain'
+            else:
+                # A soft-404: every other path gets a 200 HTML page
+                body, content_type = server.soft_404, 'text/html'
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.soft_404 = '<html><body><h1>Page not found</h1></body></html>'
+    server.hits = hits
+    server.drops = drops
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('soft_404', [
+    '<html><body><h1>Page not found</h1></body></html>',
+    # Not well-formed XML
+    '<html><body><p>Page not found<br></body></html>',
+])
+def test_soft_404_sitemap_is_cached_as_invalid(origin, soft_404):
+    origin.soft_404 = soft_404
+    cache = SiteFileCache(ttl=60, max_size=10)
+    for _ in range(3):
+        probe = cache.get_or_probe(origin.url)
+        fields = probe.analysis_fields(origin.url + '/')
+    assert fields['sitemap_xml'] is False
+    assert fields['sitemap']['invalid']
+    assert describe_sitemap(fields['sitemap']).startswith('Not a valid sitemap')
+    assert not probe.failed()
+    assert origin.hits == {'/robots.txt': 1, '/sitemap.xml': 1, '/llms.txt': 1}
+
+
+def test_network_failure_reprobes_only_that_file(origin):
+    origin.drops['/llms.txt'] = 100
+    cache = SiteFileCache(ttl=60, max_size=10)
+    probe = cache.get_or_probe(origin.url)
+    probe.results()
+    assert probe.failed()
+    failed_hits = origin.hits['/llms.txt']
+
+    origin.drops.clear()
+    probe = cache.get_or_probe(origin.url)
+    assert probe.results()['llms_txt'] is True
+    assert not probe.failed()
+    assert origin.hits['/robots.txt'] == 1
+    assert origin.hits['/sitemap.xml'] == 1
+    assert origin.hits['/llms.txt'] == failed_hits + 1
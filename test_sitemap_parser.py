@@ -0,0 +1,66 @@
+"""
+Tests for streaming sitemap entry parsing
+"""
+
+import io
+
+from sitemap_parser import iter_entries
+
+
+def test_urlset_entries():
+    xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url>
+    <loc> https://example.com/ </loc>
+    <lastmod>2024-05-01</lastmod>
+    <changefreq>daily</changefreq>
+    <priority>1.0</priority>
+  </url>
+  <url><loc>https://example.com/about</loc></url>
+  <url><lastmod>2024-05-01</lastmod></url>
+</urlset>"""
+    entries = list(iter_entries(io.BytesIO(xml)))
+    assert entries == [
+        ('url', {'loc': 'https://example.com/', 'lastmod': '2024-05-01', 'changefreq': 'daily', 'priority': '1.0'}),
+        ('url', {'loc': 'https://example.com/about'}),
+    ]
+
+
+def test_sitemap_index_entries():
+    xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/posts.xml</loc><lastmod>2024-05-01</lastmod></sitemap>
+  <sitemap><loc>/pages.xml.gz</loc></sitemap>
+</sitemapindex>"""
+    entries = list(iter_entries(io.BytesIO(xml)))
+    assert entries == [
+        ('sitemap', {'loc': 'https://example.com/posts.xml', 'lastmod': '2024-05-01'}),
+        ('sitemap', {'loc': '/pages.xml.gz'}),
+    ]
+
+
+def test_image_extension_does_not_shadow_page_loc():
+    xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url>
+    <loc>https://example.com/gallery</loc>
+    <image:image>
+      <image:loc>https://cdn.example.com/photo-1.jpg</image:loc>
+    </image:image>
+    <image:image>
+      <image:loc>https://cdn.example.com/photo-2.jpg</image:loc>
+    </image:image>
+  </url>
+  <url>
+    <image:image><image:loc>https://cdn.example.com/first.jpg</image:loc></image:image>
+    <loc>https://example.com/image-first</loc>
+  </url>
+</urlset>"""
+    locs = [entry['loc'] for _, entry in iter_entries(io.BytesIO(xml))]
+    assert locs == ['https://example.com/gallery', 'https://example.com/image-first']
+
+
+def test_sitemap_without_namespace():
+    xml = b"<urlset><url><loc>https://example.com/plain</loc></url></urlset>"
+    assert list(iter_entries(io.BytesIO(xml))) == [('url', {'loc': 'https://example.com/plain'})]
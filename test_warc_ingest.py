@@ -0,0 +1,109 @@
+"""
+Tests for WARC ingestion: record framing, per-record gzip and payload decoding
+"""
+
+import gzip
+import io
+
+from warc_ingest import _decompress, _dechunk, iter_html_records, open_archive
+
+
+def warc_record(record_type, url, content_type, block):
+    headers = (
+        "WARC/1.0\r\n"
+        f"WARC-Type: {record_type}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        "WARC-Date: 2024-01-01T00:00:00Z\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(block)}\r\n"
+        "\r\n"
+    ).encode('latin-1')
+    return headers + block + b"\r\n\r\n"
+
+
+def http_response(body, content_type='text/html; charset=utf-8', status='200 OK', extra_headers=''):
+    head = f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n{extra_headers}\r\n"
+    return head.encode('latin-1') + body
+
+
+def chunked(body, size=7):
+    parts = [b"%x\r\n%s\r\n" % (len(body[i:i + size]), body[i:i + size]) for i in range(0, len(body), size)]
+    return b''.join(parts) + b"0\r\n\r\n"
+
+
+PAGE = b"<html><head><title>Hello</title></head><body><p>Archived page</p></body></html>"
+
+
+def test_dechunk():
+    assert _dechunk(chunked(PAGE)) == PAGE
+
+
+def test_dechunk_with_extensions_and_invalid_input():
+    assert _dechunk(b"5;name=value\r\nhello\r\n0\r\n\r\n") == b"hello"
+    # A body that only looks like it has a size line is returned unchanged
+    assert _dechunk(b"<html>\r\n</html>") == b"<html>\r\n</html>"
+
+
+def test_decompress():
+    assert _decompress(gzip.compress(PAGE), 'gzip', 1024) == PAGE
+    assert _decompress(gzip.compress(PAGE), 'x-gzip', 1024) == PAGE
+    assert _decompress(PAGE, '', 1024) == PAGE
+    # Output is capped, and a corrupt stream falls back to the raw bytes
+    assert _decompress(gzip.compress(PAGE), 'gzip', 10) == PAGE[:10]
+    assert _decompress(b"not gzip", 'gzip', 1024) == b"not gzip"
+
+
+def test_iter_html_records_skips_non_html():
+    archive = b''.join([
+        warc_record('warcinfo', '', 'application/warc-fields', b"software: test\r\n"),
+        warc_record('request', 'https://example.com/', 'application/http; msgtype=request',
+                    b"GET / HTTP/1.1\r\nHost: example.com\r\n\r\n"),
+        warc_record('response', 'https://example.com/logo.png', 'application/http; msgtype=response',
+                    http_response(b"\x89PNG" * 100, content_type='image/png')),
+        warc_record('response', 'https://example.com/missing', 'application/http; msgtype=response',
+                    http_response(b"<html>gone</html>", status='404 Not Found')),
+        warc_record('response', 'https://example.com/', 'application/http; msgtype=response',
+                    http_response(PAGE)),
+        warc_record('resource', 'https://example.com/doc', 'text/html', PAGE),
+    ])
+    records = list(iter_html_records(io.BytesIO(archive)))
+    assert [record['url'] for record in records] == ['https://example.com/', 'https://example.com/doc']
+    assert records[0]['status'] == 200
+    assert records[1]['status'] is None
+    assert all('Archived page' in record['html'] for record in records)
+    assert not any(record['truncated'] for record in records)
+
+
+def test_iter_html_records_chunked_and_gzip_payloads():
+    archive = b''.join([
+        warc_record('response', 'https://example.com/chunked', 'application/http; msgtype=response',
+                    http_response(chunked(PAGE), extra_headers='Transfer-Encoding: chunked\r\n')),
+        warc_record('response', 'https://example.com/gzip', 'application/http; msgtype=response',
+                    http_response(chunked(gzip.compress(PAGE)),
+                                  extra_headers='Transfer-Encoding: chunked\r\nContent-Encoding: gzip\r\n')),
+    ])
+    records = list(iter_html_records(io.BytesIO(archive)))
+    assert [record['url'] for record in records] == ['https://example.com/chunked', 'https://example.com/gzip']
+    assert all(record['html'] == PAGE.decode() for record in records)
+
+
+def test_iter_html_records_truncates_large_bodies():
+    archive = warc_record('resource', 'https://example.com/big', 'text/html', PAGE)
+    record, = iter_html_records(io.BytesIO(archive), max_body=20)
+    assert record['truncated']
+    assert record['html'] == PAGE[:20].decode()
+
+
+def test_gzip_per_record_archive(tmp_path):
+    path = tmp_path / 'crawl.warc.gz'
+    # Each record is its own gzip member, as crawlers write them
+    path.write_bytes(b''.join([
+        gzip.compress(warc_record('warcinfo', '', 'application/warc-fields', b"software: test\r\n")),
+        gzip.compress(warc_record('response', 'https://example.com/a', 'application/http; msgtype=response',
+                                  http_response(PAGE))),
+        gzip.compress(warc_record('response', 'https://example.com/b', 'application/http; msgtype=response',
+                                  http_response(PAGE))),
+    ]))
+    with open_archive(str(path)) as stream:
+        urls = [record['url'] for record in iter_html_records(stream)]
+    assert urls == ['https://example.com/a', 'https://example.com/b']
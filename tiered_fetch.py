@@ -0,0 +1,160 @@
+"""
+Adaptive static-then-rendered fetching
+Every page is fetched statically first. Pages that look like JavaScript
+shells (empty body, bare framework root, almost no text) or bot-challenge
+interstitials are re-fetched through the headless browser pool. Origins that
+needed rendering are remembered so later pages skip the wasted static fetch.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import BROWSER_SETTINGS, FETCH_SETTINGS
+from fetch_client import get_fetch_client, get_origin, FetchResult
+
+# The browser tier is optional (selenium may not be installed)
+try:
+    from browser_analyzer import fetch_with_browser
+    BROWSER_AVAILABLE = True
+except ImportError:
+    fetch_with_browser = None
+    BROWSER_AVAILABLE = False
+
+# Below this much visible text a page is treated as an empty shell
+MIN_TEXT_CHARS = 200
+# Visible text / HTML bytes below this (with scripts present) suggests client rendering
+MIN_TEXT_RATIO = 0.02
+
+SCRIPT_STYLE_RE = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>', re.I | re.S)
+SCRIPT_TAG_RE = re.compile(r'<script\b', re.I)
+TAG_RE = re.compile(r'<[^>]+>')
+WHITESPACE_RE = re.compile(r'\s+')
+# Empty mount points used by React, Vue, Next.js, Nuxt, Angular, Svelte...
+FRAMEWORK_ROOT_RE = re.compile(
+    r'<(div|main|app-root)\b[^>]*\bid=["\']?(root|app|__next|__nuxt|svelte|main-app)["\']?[^>]*>\s*</\1>'
+    r'|<app-root\b[^>]*>\s*</app-root>',
+    re.I
+)
+CHALLENGE_MARKERS = [
+    'cf-browser-verification', 'cf-challenge', 'challenge-platform', 'just a moment...',
+    'checking your browser', '_incapsula_resource', 'px-captcha', 'ddos protection by',
+    'please enable javascript', 'enable javascript and cookies to continue',
+    'attention required! | cloudflare'
+]
+
+
+def _visible_text_length(html_content):
+    """Cheap regex estimate of visible text, without building a parse tree"""
+    text = SCRIPT_STYLE_RE.sub(' ', html_content)
+    text = TAG_RE.sub(' ', text)
+    return len(WHITESPACE_RE.sub(' ', text).strip())
+
+
+def needs_rendering(html_content):
+    """Return a reason string if the static HTML looks client-rendered or blocked, else None"""
+    if not html_content or not html_content.strip():
+        return 'empty response body'
+    lowered = html_content[:20000].lower()
+    for marker in CHALLENGE_MARKERS:
+        if marker in lowered:
+            return f"bot challenge page ({marker})"
+    text_length = _visible_text_length(html_content)
+    if text_length < MIN_TEXT_CHARS:
+        if FRAMEWORK_ROOT_RE.search(html_content):
+            return 'empty JavaScript framework root element'
+        return f"almost no visible text ({text_length} characters)"
+    has_scripts = SCRIPT_TAG_RE.search(html_content) is not None
+    if has_scripts and text_length / len(html_content) < MIN_TEXT_RATIO:
+        return f"very low text-to-markup ratio ({text_length / len(html_content):.3f})"
+    return None
+
+
+class RenderDecisionCache:
+    """Per-origin memory of 'this site needs a browser', with TTL and LRU eviction"""
+
+    def __init__(self, ttl=None, max_size=None):
+        self.ttl = BROWSER_SETTINGS['render_decision_ttl'] if ttl is None else ttl
+        self.max_size = BROWSER_SETTINGS['render_decision_cache_size'] if max_size is None else max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, origin):
+        """Return the cached escalation reason for origin, or None"""
+        with self.lock:
+            entry = self.entries.get(origin)
+            if not entry:
+                return None
+            if time.monotonic() - entry['at'] > self.ttl:
+                del self.entries[origin]
+                return None
+            self.entries.move_to_end(origin)
+            return entry['reason']
+
+    def remember(self, origin, reason):
+        with self.lock:
+            self.entries[origin] = {'reason': reason, 'at': time.monotonic()}
+            self.entries.move_to_end(origin)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def forget(self, origin):
+        with self.lock:
+            self.entries.pop(origin, None)
+
+
+render_decisions = RenderDecisionCache()
+
+
+def _render(url, reason):
+    """Fetch url through the browser pool; returns a FetchResult or None"""
+    html_content = fetch_with_browser(url)
+    if not html_content:
+        return None
+    result = FetchResult(url, status_code=200, content=html_content.encode('utf-8'),
+                         text=html_content, encoding='utf-8', encoding_source='rendered')
+    result.fetch_tier = 'rendered'
+    result.render_reason = reason
+    return result
+
+
+def fetch_tiered(url, forbidden_backoff=True):
+    """Fetch url statically, escalating to the browser pool only when needed"""
+    # Browser renders are not recorded, so cassette runs stay static-only
+    escalate = (BROWSER_AVAILABLE and BROWSER_SETTINGS['render_escalation']
+                and FETCH_SETTINGS['cassette_mode'] == 'off')
+    origin = get_origin(url)
+
+    # Known JS-dependent origin: go straight to the browser
+    if escalate:
+        cached_reason = render_decisions.get(origin)
+        if cached_reason:
+            rendered = _render(url, f"origin previously needed rendering: {cached_reason}")
+            if rendered:
+                return rendered
+            render_decisions.forget(origin)
+
+    result = get_fetch_client().fetch_page(url, forbidden_backoff)
+    if not escalate:
+        return result
+
+    if result.ok:
+        reason = needs_rendering(result.text)
+    elif result.status_code == 403:
+        reason = 'static fetch was forbidden (403)'
+    else:
+        reason = None
+    if not reason:
+        return result
+
+    print(f"Escalating {url} to browser rendering: {reason}")
+    rendered = _render(url, reason)
+    if not rendered:
+        return result
+    # Only remember origins where rendering actually surfaced more content;
+    # a page that is merely short would otherwise flag its whole site
+    static_text = _visible_text_length(result.text) if result.ok else 0
+    if not needs_rendering(rendered.text) and _visible_text_length(rendered.text) >= 2 * static_text:
+        render_decisions.remember(origin, reason)
+    return rendered
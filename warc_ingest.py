@@ -0,0 +1,234 @@
+"""
+WARC ingestion for offline batch analysis
+Streams records out of .warc / .warc.gz crawl archives one at a time, runs
+every HTML response through analyze_webpage_structure with its original URL
+and writes one JSON line per page. Memory stays constant regardless of the
+archive size: non-HTML payloads are skipped in chunks and HTML bodies are
+capped at FETCH_MAX_DECODED_BYTES.
+
+Usage:
+    python warc_ingest.py crawl.warc.gz [more.warc ...] -o results.jsonl
+"""
+
+import argparse
+import contextlib
+import gzip
+import json
+import sys
+import zlib
+from datetime import datetime
+
+from config import FETCH_SETTINGS
+from charset_resolver import decode_html
+
+CHUNK_SIZE = 64 * 1024
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+
+def open_archive(path):
+    """Open a WARC file for streaming, transparently handling per-record gzip"""
+    with open(path, 'rb') as raw_file:
+        magic = raw_file.read(2)
+    if magic == b'\x1f\x8b':
+        # gzip.open reads concatenated members (one per record) sequentially
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _parse_headers(lines):
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(b':')
+        if value:
+            headers[name.strip().decode('latin-1').lower()] = value.strip().decode('latin-1')
+    return headers
+
+
+def _read_header_block(stream, limit):
+    """Read CRLF-terminated header lines up to the blank line; returns (lines, bytes_read)"""
+    lines = []
+    consumed = 0
+    while consumed < limit:
+        line = stream.readline(min(CHUNK_SIZE, limit - consumed))
+        if not line:
+            break
+        consumed += len(line)
+        if line in (b'\r\n', b'\n'):
+            break
+        lines.append(line.rstrip(b'\r\n'))
+    return lines, consumed
+
+
+def _read_capped(stream, length, cap):
+    """Read length bytes, keeping at most cap of them; returns (data, truncated)"""
+    chunks = []
+    kept = 0
+    remaining = length
+    while remaining > 0:
+        chunk = stream.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        if kept < cap:
+            chunks.append(chunk[:cap - kept])
+            kept += len(chunks[-1])
+    return b''.join(chunks), kept < length - remaining
+
+
+def _skip(stream, length):
+    while length > 0:
+        chunk = stream.read(min(CHUNK_SIZE, length))
+        if not chunk:
+            break
+        length -= len(chunk)
+
+
+def _dechunk(body):
+    """Undo HTTP chunked transfer-encoding (crawlers often store it verbatim)"""
+    output = []
+    position = 0
+    while position < len(body):
+        line_end = body.find(b'\r\n', position)
+        if line_end == -1:
+            break
+        size_field = body[position:line_end].split(b';')[0].strip()
+        try:
+            size = int(size_field, 16)
+        except ValueError:
+            return body  # Not actually chunked
+        if size == 0:
+            break
+        start = line_end + 2
+        output.append(body[start:start + size])
+        position = start + size + 2
+    return b''.join(output)
+
+
+def _decompress(body, content_encoding, cap):
+    if content_encoding in ('gzip', 'x-gzip', 'deflate'):
+        wbits = 16 + zlib.MAX_WBITS if 'gzip' in content_encoding else zlib.MAX_WBITS
+        try:
+            return zlib.decompressobj(wbits).decompress(body, cap)
+        except zlib.error:
+            return body
+    return body
+
+
+def iter_html_records(stream, max_body=None):
+    """Yield {'url', 'date', 'status', 'content_type', 'html', 'truncated'} per HTML page
+
+    Handles 'response' records (HTTP message payloads) and 'resource'
+    records (bare documents). All other records are skipped without being
+    held in memory.
+    """
+    if max_body is None:
+        max_body = FETCH_SETTINGS['max_decoded_bytes']
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        if not line.startswith(b'WARC/'):
+            continue  # Blank separator lines between records
+        header_lines, _ = _read_header_block(stream, CHUNK_SIZE * 4)
+        warc_headers = _parse_headers(header_lines)
+        try:
+            length = int(warc_headers.get('content-length', 0))
+        except ValueError:
+            length = 0
+        record_type = warc_headers.get('warc-type', '')
+        record_content_type = warc_headers.get('content-type', '').lower()
+        url = warc_headers.get('warc-target-uri', '').strip('<>')
+
+        if record_type == 'response' and 'application/http' in record_content_type:
+            http_lines, consumed = _read_header_block(stream, length)
+            if not http_lines:
+                _skip(stream, length - consumed)
+                continue
+            status_parts = http_lines[0].split()
+            status = int(status_parts[1]) if len(status_parts) > 1 and status_parts[1].isdigit() else None
+            http_headers = _parse_headers(http_lines[1:])
+            content_type = http_headers.get('content-type', '')
+            if status != 200 or not content_type.lower().startswith(HTML_TYPES):
+                _skip(stream, length - consumed)
+                continue
+            body, truncated = _read_capped(stream, length - consumed, max_body)
+            if 'chunked' in http_headers.get('transfer-encoding', '').lower():
+                body = _dechunk(body)
+            body = _decompress(body, http_headers.get('content-encoding', '').lower(), max_body)
+        elif record_type == 'resource' and record_content_type.startswith(HTML_TYPES):
+            status = None
+            content_type = record_content_type
+            body, truncated = _read_capped(stream, length, max_body)
+        else:
+            _skip(stream, length)
+            continue
+
+        html_content, encoding, _ = decode_html(body, content_type)
+        yield {
+            'url': url,
+            'date': warc_headers.get('warc-date'),
+            'status': status,
+            'content_type': content_type,
+            'encoding': encoding,
+            'html': html_content,
+            'truncated': truncated
+        }
+
+
+def analyze_record(record):
+    """Run one archived page through the standard analysis pipeline"""
+    from app import analyze_webpage_structure, calculate_ai_readiness_score
+    try:
+        analysis = analyze_webpage_structure(record['html'], record['url'], check_site_files=False)
+        score, score_breakdown = calculate_ai_readiness_score(analysis)
+        return {
+            'url': record['url'],
+            'archived_at': record['date'],
+            'score': score,
+            'score_breakdown': score_breakdown,
+            'analysis': analysis,
+            'truncated': record['truncated']
+        }
+    except Exception as e:
+        return {'url': record['url'], 'archived_at': record['date'], 'error': str(e)}
+
+
+def ingest_warc(paths, output):
+    """Analyze every HTML page in the given archives, writing JSONL to output"""
+    pages = 0
+    errors = 0
+    for path in paths:
+        with open_archive(path) as stream:
+            for record in iter_html_records(stream):
+                result = analyze_record(record)
+                output.write(json.dumps(result, default=str) + '\n')
+                pages += 1
+                if 'error' in result:
+                    errors += 1
+                if pages % 100 == 0:
+                    output.flush()
+                    print(f"{datetime.now().isoformat()} analyzed {pages} pages ({errors} errors)", file=sys.stderr)
+    output.flush()
+    return {'pages': pages, 'errors': errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze HTML pages stored in WARC archives')
+    parser.add_argument('archives', nargs='+', help='.warc or .warc.gz files')
+    parser.add_argument('-o', '--output', default='-', help='JSONL output file (default: stdout)')
+    args = parser.parse_args()
+
+    # Importing the app prints start-up messages; keep them out of the JSONL
+    with contextlib.redirect_stdout(sys.stderr):
+        import app  # noqa: F401
+
+    if args.output == '-':
+        summary = ingest_warc(args.archives, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            summary = ingest_warc(args.archives, output)
+    print(f"Done: {summary['pages']} pages analyzed, {summary['errors']} errors", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()